@@ -4,13 +4,16 @@ Provides AI-powered analysis for workflows
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from backend.services.workflow_analyzer import workflow_analyzer
-from backend.api.auth import get_current_user
+from backend.api.deps import get_current_user
 from backend.database.supabase_client import get_supabase_client
+import logging
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+router = APIRouter(default_response_class=ORJSONResponse)
 
 class AnalysisRequest(BaseModel):
     workflow_id: str
@@ -22,7 +25,7 @@ class AnalysisResponse(BaseModel):
     analysis: Dict[str, Any]
     generated_at: str
 
-@router.post("/analyze", response_model=AnalysisResponse, status_code=status.HTTP_200_OK)
+@router.post("/analyze", status_code=status.HTTP_200_OK, responses={200: {"model": AnalysisResponse}})
 async def analyze_workflow(
     request: AnalysisRequest,
     user_id: str = Depends(get_current_user)
@@ -51,16 +54,15 @@ async def analyze_workflow(
         # You could store this in a new 'workflow_analyses' table
         # For now, we'll just return it
         
-        return AnalysisResponse(
-            workflow_id=request.workflow_id,
-            analysis=analysis_results,
-            generated_at=analysis_results['analyzed_at']
-        )
+        # The analyzer output is already well-formed - skip response-model validation
+        return ORJSONResponse({
+            "workflow_id": request.workflow_id,
+            "analysis": analysis_results,
+            "generated_at": analysis_results['analyzed_at']
+        })
     
     except Exception as e:
-        import traceback
-        print(f"Analysis error: {e}")
-        print(traceback.format_exc())
+        logger.exception("Analysis error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
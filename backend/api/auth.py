@@ -1,31 +1,71 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
 from typing import Optional
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 import bcrypt
-from jose import JWTError, jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
+import jwt
 from datetime import datetime, timedelta
 import os
 from backend.database.supabase_client import get_supabase_client
+from backend.api.deps import SECRET_KEY, ALGORITHM, get_current_user
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
-security = HTTPBearer()
 
-# JWT Configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
-ALGORITHM = "HS256"
+# JWT Configuration (SECRET_KEY / ALGORITHM live in deps alongside the verifier)
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# Postgres SQLSTATE for unique_violation
+UNIQUE_VIOLATION = "23505"
+
+# Password hashing (argon2id) - tune via env for the deployment's latency budget
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "19456"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM
+)
+# Hashes created before the argon2 switch
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# Password hashing is CPU-bound by design - run it in worker processes so it never blocks the event loop
+_HASH_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
 
 # Request/Response Models
+def _encode_password(value):
+    """Encode the password to UTF-8 once, at parse time, so the hashing helpers work on bytes"""
+    return value.encode('utf-8') if isinstance(value, str) else value
+
 class SignupRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     email: EmailStr
-    password: str
+    password: bytes
     full_name: Optional[str] = None
+    
+    @field_validator("password", mode="before")
+    @classmethod
+    def _password_to_bytes(cls, value):
+        return _encode_password(value)
 
 class LoginRequest(BaseModel):
-    email: EmailStr
-    password: str
+    # Plain str: a malformed email simply won't match a user, so skip email-validator here
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
+    email: str
+    password: bytes
+    
+    @field_validator("password", mode="before")
+    @classmethod
+    def _password_to_bytes(cls, value):
+        return _encode_password(value)
 
 class TokenResponse(BaseModel):
     access_token: str
@@ -33,18 +73,29 @@ class TokenResponse(BaseModel):
 
 
 # Helper functions
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a bcrypt hash"""
-    password_bytes = plain_password.encode('utf-8')[:72]
-    hashed_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+def hash_password(password_bytes: bytes) -> str:
+    """Hash a password using argon2id"""
+    return _password_hasher.hash(password_bytes)
+
+def verify_password(password_bytes: bytes, hashed_password: str) -> bool:
+    """Verify a password against an argon2 hash (or a legacy bcrypt hash)"""
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        # bcrypt only ever saw the first 72 bytes
+        return bcrypt.checkpw(password_bytes[:72], hashed_password.encode('utf-8'))
+    try:
+        return _password_hasher.verify(hashed_password, password_bytes)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for legacy bcrypt hashes or argon2 hashes with outdated parameters"""
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return True
+    return _password_hasher.check_needs_rehash(hashed_password)
+
+def _is_unique_violation(error: Exception) -> bool:
+    """Detect a Postgres unique-constraint violation (PostgREST or psycopg2)"""
+    return getattr(error, "code", None) == UNIQUE_VIOLATION or getattr(error, "pgcode", None) == UNIQUE_VIOLATION
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -57,24 +108,6 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user from JWT token"""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials"
-            )
-        return user_id
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
-        )
-
 
 # ============== SIGNUP ==============
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
@@ -86,35 +119,34 @@ async def signup(request: SignupRequest):
     supabase = get_supabase_client()
     
     try:
-        # Check if user already exists
-        existing_user = supabase.table("users")\
-            .select("id")\
-            .eq("email", request.email)\
-            .execute()
-        
-        if existing_user.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
-        # Validate password
-        if len(request.password) < 8:
+        # Validate password (length in characters, not UTF-8 bytes)
+        if len(request.password.decode('utf-8')) < 8:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Password must be at least 8 characters"
             )
         
         # Hash password
-        hashed_password = hash_password(request.password)
+        hashed_password = await asyncio.get_running_loop().run_in_executor(
+            _HASH_POOL, hash_password, request.password
+        )
         
-        # Create user in database (email_verified=True for dev)
-        result = supabase.table("users").insert({
-            "email": request.email,
-            "full_name": request.full_name,
-            "password_hash": hashed_password,
-            "email_verified": True  # Skip verification for development
-        }).execute()
+        # Create user in database (email_verified=True for dev).
+        # The UNIQUE constraint on users.email rejects duplicates, so no separate lookup is needed.
+        try:
+            result = supabase.table("users").insert({
+                "email": request.email,
+                "full_name": request.full_name,
+                "password_hash": hashed_password,
+                "email_verified": True  # Skip verification for development
+            }).execute()
+        except Exception as e:
+            if _is_unique_violation(e):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
+            raise
         
         if not result.data:
             raise HTTPException(
@@ -137,7 +169,7 @@ async def signup(request: SignupRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Signup error: {e}")
+        logger.exception("Signup error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Signup error: {str(e)}"
@@ -168,12 +200,28 @@ async def login(request: LoginRequest):
         user = result.data[0]
         
         # Verify password
-        if not verify_password(request.password, user["password_hash"]):
+        password_ok = await asyncio.get_running_loop().run_in_executor(
+            _HASH_POOL, verify_password, request.password, user["password_hash"]
+        )
+        if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
+        # Upgrade legacy bcrypt / outdated argon2 hashes now that we have the plaintext
+        if password_needs_rehash(user["password_hash"]):
+            try:
+                new_hash = await asyncio.get_running_loop().run_in_executor(
+                    _HASH_POOL, hash_password, request.password
+                )
+                supabase.table("users")\
+                    .update({"password_hash": new_hash})\
+                    .eq("id", user["id"])\
+                    .execute()
+            except Exception as e:
+                logger.warning("Password rehash error: %s", e)
+        
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
@@ -186,7 +234,7 @@ async def login(request: LoginRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception("Login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Login error: {str(e)}"
@@ -0,0 +1,45 @@
+"""
+Short-lived cache of verified JWT payloads
+
+Dashboards re-send the same bearer token on every request, so we keep the
+decoded payload for a few seconds instead of re-running HS256 verification.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+TOKEN_CACHE_MAXSIZE = 10000
+TOKEN_CACHE_TTL_SECONDS = 5
+
+_token_cache: TTLCache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+_token_cache_lock = threading.Lock()
+
+
+def _token_key(token: str) -> bytes:
+    """Hash the raw token so the cache never holds bearer credentials"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+def get_cached_payload(token: str) -> Optional[Dict[str, Any]]:
+    """Return the cached payload for a token if it is still unexpired"""
+    key = _token_key(token)
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+    if payload is None:
+        return None
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        with _token_cache_lock:
+            _token_cache.pop(key, None)
+        return None
+    return payload
+
+
+def cache_payload(token: str, payload: Dict[str, Any]) -> None:
+    """Store a successfully verified payload"""
+    with _token_cache_lock:
+        _token_cache[_token_key(token)] = payload
@@ -1,25 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from typing import Optional, Dict, Any, List
-from backend.api.auth import get_current_user
-from datetime import datetime, timedelta
+from backend.api.deps import get_current_user
+from backend.services.workflow_service import workflow_service
+from backend.services.metrics_tracking_service import metrics_tracking_service, COST_BREAKDOWN_TEMPLATE
+from datetime import date, datetime, timedelta
+import asyncio
 import hashlib
-import random
+import threading
+import re
+import numpy as np
+import orjson
+from cachetools import TTLCache
+import logging
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+router = APIRouter(default_response_class=ORJSONResponse)
 
-def get_seed(user_id: str, time_range: str) -> int:
+# Serialized simulated metrics keyed by (user_id, time_range, date)
+_metrics_cache: TTLCache = TTLCache(maxsize=4096, ttl=3600)
+_metrics_cache_lock = threading.Lock()
+
+# Canonical hyphenated UUID (what the database hands out as workflow ids)
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+# Unseeded generator for simulated workflow runs
+_execution_rng = np.random.default_rng()
+
+# Simulated agents: (name, status threshold, status above threshold, status otherwise).
+# A threshold of None means the status is fixed.
+AGENT_PROFILES = [
+    ("Email Processor", 0.3, "optimal", "good"),
+    ("Data Analyzer", 0.4, "good", "moderate"),
+    ("Response Generator", None, "optimal", "optimal"),
+    ("Document Parser", 0.5, "moderate", "good"),
+]
+AGENT_SUCCESS_BASE = np.array([96, 93, 97, 90])
+AGENT_SUCCESS_SPAN = np.array([3.5, 4, 2.5, 5])
+AGENT_LATENCY_BASE = np.array([30, 80, 25, 120])
+AGENT_LATENCY_SPAN = np.array([25, 60, 20, 80])
+AGENT_EXECUTIONS_BASE = np.array([5000, 3000, 4000, 1500])
+AGENT_EXECUTIONS_SPAN = np.array([3000, 2000, 2500, 1500])
+
+# Quick stat cards: (label, trend, description template) - values and changes are filled per request
+QUICK_STAT_META = (
+    ("Total Cost", "down", "Total infrastructure cost for {time_range}"),
+    ("Avg Latency", "down", "Average response time per request"),
+    ("Throughput", "up", "Requests processed per minute"),
+    ("Error Rate", "down", "Failed requests percentage"),
+)
+
+def get_seed(user_id: str, time_range: str, today: Optional[str] = None) -> int:
     """Generate a consistent seed based on user ID, date, and time range"""
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = today or date.today().isoformat()
     seed_string = f"{user_id}-{today}-{time_range}"
-    return int(hashlib.md5(seed_string.encode()).hexdigest()[:8], 16)
+    # First 4 digest bytes, big-endian - same value as int(hexdigest()[:8], 16) without the hex round-trip
+    return int.from_bytes(hashlib.md5(seed_string.encode()).digest()[:4], "big")
 
-def generate_metrics_data(user_id: str, time_range: str) -> Dict[str, Any]:
+def generate_metrics_data(user_id: str, time_range: str, now: Optional[datetime] = None) -> Dict[str, Any]:
     """
     Generate realistic metrics data based on time range.
     Uses a seed for consistency - same user sees same data on the same day.
+    Pass `now` to reuse the request's clock reading instead of querying it again.
     """
-    seed = get_seed(user_id, time_range)
-    rng = random.Random(seed)
+    now = now or datetime.now()
+    seed = get_seed(user_id, time_range, now.date().isoformat())
+    rng = np.random.default_rng(seed)
     
     # Scale factors based on time range
     scale_factors = {
@@ -30,11 +76,10 @@ def generate_metrics_data(user_id: str, time_range: str) -> Dict[str, Any]:
     }
     scale = scale_factors.get(time_range, 1)
     
-    # Base metrics (per day)
-    base_cost = rng.uniform(35, 55)  # $35-55 per day
-    base_latency = rng.uniform(180, 280)  # 180-280ms base
-    base_throughput = rng.uniform(70, 100)  # 70-100 rpm
-    base_error_rate = rng.uniform(0.005, 0.02)  # 0.5-2% error rate
+    # Base metrics (per day): cost $35-55, latency 180-280ms, throughput 70-100 rpm, error rate 0.5-2%
+    base_cost, base_latency, base_throughput, base_error_rate = rng.uniform(
+        [35, 180, 70, 0.005], [55, 280, 100, 0.02]
+    ).tolist()
     
     # Calculate scaled values
     total_cost = round(base_cost * scale, 0)
@@ -51,70 +96,57 @@ def generate_metrics_data(user_id: str, time_range: str) -> Dict[str, Any]:
     error_improvement = min(0.5, scale * 0.008)  # Up to 50% improvement
     error_rate = round(base_error_rate * (1 - error_improvement), 4)
     
-    # Changes compared to previous period
-    cost_change = rng.randint(-20, -5)  # Cost usually decreases (good)
-    latency_change = rng.randint(-15, -3)  # Latency decreases (good)
-    throughput_change = rng.randint(5, 25)  # Throughput increases (good)
-    error_change = rng.randint(-60, -30)  # Errors decrease (good)
+    # Changes compared to previous period (cost/latency/errors decrease, throughput increases - all good)
+    cost_change, latency_change, throughput_change, error_change = rng.integers(
+        [-20, -15, 5, -60], [-4, -2, 26, -29]
+    ).tolist()
     
     # ROI metrics scale with time
-    hours_saved = round(rng.uniform(4, 8) * scale, 0)
-    cost_saved = round(hours_saved * rng.uniform(80, 150), 0)  # $80-150 per hour saved
-    efficiency_gain = round(200 + rng.uniform(50, 200) * (1 + scale * 0.01), 0)
-    error_reduction = round(85 + rng.uniform(5, 12) * min(scale * 0.1, 1), 0)
+    hours_per_day, hourly_value, efficiency_draw, reduction_draw = rng.uniform(
+        [4, 80, 50, 5], [8, 150, 200, 12]
+    ).tolist()
+    hours_saved = round(hours_per_day * scale, 0)
+    cost_saved = round(hours_saved * hourly_value, 0)  # $80-150 per hour saved
+    efficiency_gain = round(200 + efficiency_draw * (1 + scale * 0.01), 0)
+    error_reduction = round(85 + reduction_draw * min(scale * 0.1, 1), 0)
     
     # Agent performance (consistent per user)
+    agent_success = rng.uniform(AGENT_SUCCESS_BASE, AGENT_SUCCESS_BASE + AGENT_SUCCESS_SPAN).round(1).tolist()
+    agent_latency = (AGENT_LATENCY_BASE + rng.uniform(0, AGENT_LATENCY_SPAN)).round().astype(int).tolist()
+    agent_executions = (
+        (AGENT_EXECUTIONS_BASE + rng.integers(0, AGENT_EXECUTIONS_SPAN + 1)) * scale
+    ).tolist()
+    agent_status_draws = rng.random(len(AGENT_PROFILES)).tolist()
     agents = [
         {
-            "name": "Email Processor",
-            "success": round(96 + rng.uniform(0, 3.5), 1),
-            "latency": round(30 + rng.uniform(0, 25)),
-            "executions": round((5000 + rng.randint(0, 3000)) * scale),
-            "status": "optimal" if rng.random() > 0.3 else "good"
-        },
-        {
-            "name": "Data Analyzer",
-            "success": round(93 + rng.uniform(0, 4), 1),
-            "latency": round(80 + rng.uniform(0, 60)),
-            "executions": round((3000 + rng.randint(0, 2000)) * scale),
-            "status": "good" if rng.random() > 0.4 else "moderate"
-        },
-        {
-            "name": "Response Generator",
-            "success": round(97 + rng.uniform(0, 2.5), 1),
-            "latency": round(25 + rng.uniform(0, 20)),
-            "executions": round((4000 + rng.randint(0, 2500)) * scale),
-            "status": "optimal"
-        },
-        {
-            "name": "Document Parser",
-            "success": round(90 + rng.uniform(0, 5), 1),
-            "latency": round(120 + rng.uniform(0, 80)),
-            "executions": round((1500 + rng.randint(0, 1500)) * scale),
-            "status": "moderate" if rng.random() > 0.5 else "good"
+            "name": name,
+            "success": success,
+            "latency": latency,
+            "executions": executions,
+            "status": upper_status if threshold is None or draw > threshold else lower_status
         }
+        for (name, threshold, upper_status, lower_status), success, latency, executions, draw in zip(
+            AGENT_PROFILES, agent_success, agent_latency, agent_executions, agent_status_draws
+        )
     ]
     
     # Cost breakdown (percentages stay similar, amounts scale)
     cost_breakdown = [
-        {"label": "AI Model Inference", "value": 45, "amount": round(total_cost * 0.45), "color": "sunset"},
-        {"label": "Data Processing", "value": 25, "amount": round(total_cost * 0.25), "color": "forest"},
-        {"label": "Storage", "value": 15, "amount": round(total_cost * 0.15), "color": "coral"},
-        {"label": "Network", "value": 10, "amount": round(total_cost * 0.10), "color": "amber"},
-        {"label": "Other", "value": 5, "amount": round(total_cost * 0.05), "color": "muted"}
+        {"label": label, "value": percent, "amount": round(total_cost * share), "color": color}
+        for label, percent, share, color in COST_BREAKDOWN_TEMPLATE
     ]
     
     # Execution volume data points (12 points for chart)
-    data_points = [
-        round(40 + rng.uniform(0, 60) * (1 + scale * 0.005))
-        for _ in range(12)
-    ]
+    data_points = (40 + rng.uniform(0, 60, 12) * (1 + scale * 0.005)).round().astype(int).tolist()
     
     # Wait time distribution
+    queue_ms, processing_ms, response_ms = (
+        rng.uniform([15, 130, 25], [30, 180, 45]).round().astype(int).tolist()
+    )
     wait_time = {
-        "queue": round(15 + rng.uniform(0, 15)),
-        "processing": round(130 + rng.uniform(0, 50)),
-        "response": round(25 + rng.uniform(0, 20))
+        "queue": queue_ms,
+        "processing": processing_ms,
+        "response": response_ms
     }
     total_wait = wait_time["queue"] + wait_time["processing"] + wait_time["response"]
     wait_distribution = [
@@ -125,36 +157,15 @@ def generate_metrics_data(user_id: str, time_range: str) -> Dict[str, Any]:
     
     return {
         "timeRange": time_range,
-        "generatedAt": datetime.now().isoformat(),
+        "generatedAt": now.isoformat(),
         "quickStats": [
-            {
-                "label": "Total Cost",
-                "value": f"${int(total_cost):,}",
-                "change": f"{cost_change}%",
-                "trend": "down",
-                "description": f"Total infrastructure cost for {time_range}"
-            },
-            {
-                "label": "Avg Latency",
-                "value": f"{int(avg_latency)}ms",
-                "change": f"{latency_change}%",
-                "trend": "down",
-                "description": "Average response time per request"
-            },
-            {
-                "label": "Throughput",
-                "value": f"{int(throughput)} rpm",
-                "change": f"+{throughput_change}%",
-                "trend": "up",
-                "description": "Requests processed per minute"
-            },
-            {
-                "label": "Error Rate",
-                "value": f"{error_rate:.2f}%",
-                "change": f"{error_change}%",
-                "trend": "down",
-                "description": "Failed requests percentage"
-            }
+            {"label": label, "value": value, "change": change, "trend": trend,
+             "description": description.format(time_range=time_range)}
+            for (label, trend, description), value, change in zip(
+                QUICK_STAT_META,
+                (f"${int(total_cost):,}", f"{int(avg_latency)}ms", f"{int(throughput)} rpm", f"{error_rate:.2f}%"),
+                (f"{cost_change}%", f"{latency_change}%", f"+{throughput_change}%", f"{error_change}%")
+            )
         ],
         "roiMetrics": {
             "timeSaved": f"{int(hours_saved)} hours",
@@ -170,6 +181,22 @@ def generate_metrics_data(user_id: str, time_range: str) -> Dict[str, Any]:
     }
 
 
+def get_metrics_payload(user_id: str, time_range: str) -> bytes:
+    """
+    Serialized simulated metrics, memoized per (user, range, day).
+    The seed only changes at day rollover, so repeated dashboard polls hit the cache.
+    """
+    now = datetime.now()
+    key = (user_id, time_range, now.date().isoformat())
+    with _metrics_cache_lock:
+        payload = _metrics_cache.get(key)
+    if payload is None:
+        payload = orjson.dumps(generate_metrics_data(user_id, time_range, now))
+        with _metrics_cache_lock:
+            _metrics_cache[key] = payload
+    return payload
+
+
 def generate_empty_metrics(time_range: str) -> Dict[str, Any]:
     """Generate empty/zero metrics when user has no workflows"""
     return {
@@ -194,6 +221,13 @@ def generate_empty_metrics(time_range: str) -> Dict[str, Any]:
     }
 
 
+# Empty metrics only vary by time range - serialize each variant once at import
+EMPTY_METRICS_PAYLOADS = {
+    time_range: orjson.dumps(generate_empty_metrics(time_range))
+    for time_range in ("24h", "7d", "30d", "90d")
+}
+
+
 @router.get("/metrics/telemetry")
 async def get_telemetry_metrics(
     range: str = Query(default="7d", regex="^(24h|7d|30d|90d)$"),
@@ -205,30 +239,25 @@ async def get_telemetry_metrics(
     Returns real execution data if available, otherwise returns empty/zero metrics.
     """
     try:
-        # Import here to avoid circular imports
-        from backend.services.workflow_service import workflow_service
-        from backend.services.metrics_tracking_service import metrics_tracking_service
-        
-        # Check if user has any workflows
-        workflows = await workflow_service.get_user_workflows(user_id)
+        # Workflows and execution-log aggregates are independent queries - fetch them together
+        has_workflows, real_payload = await asyncio.gather(
+            workflow_service.user_has_workflows(user_id),
+            metrics_tracking_service.get_aggregated_metrics(user_id, range, as_bytes=True)
+        )
         
-        if not workflows or len(workflows) == 0:
+        if not has_workflows:
             # Return empty metrics if no workflows
-            return generate_empty_metrics(range)
-        
-        # Try to get real aggregated metrics from execution logs
-        real_metrics = await metrics_tracking_service.get_aggregated_metrics(user_id, range)
+            return Response(content=EMPTY_METRICS_PAYLOADS[range], media_type="application/json")
         
-        if real_metrics and real_metrics.get("totalExecutions", 0) > 0:
-            # Return real metrics from execution logs
-            return real_metrics
+        if real_payload:
+            # Return real metrics from execution logs (only produced when totalExecutions > 0)
+            return Response(content=real_payload, media_type="application/json")
         
         # Fall back to simulated data if no execution logs yet
         # (This allows the dashboard to show sample data until real executions happen)
-        metrics = generate_metrics_data(user_id, range)
-        return metrics
+        return Response(content=get_metrics_payload(user_id, range), media_type="application/json")
     except Exception as e:
-        print(f"Error getting telemetry metrics: {e}")
+        logger.exception("Error getting telemetry metrics")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate metrics: {str(e)}"
@@ -246,18 +275,9 @@ async def run_workflow_and_log(
     This creates real execution logs that will appear in the metrics dashboard.
     Use this to generate realistic data for demo purposes.
     """
-    import uuid
-    
     try:
-        from backend.services.metrics_tracking_service import metrics_tracking_service
-        
         # Check if workflow_id is a valid UUID
-        is_valid_uuid = False
-        try:
-            uuid.UUID(workflow_id)
-            is_valid_uuid = True
-        except ValueError:
-            is_valid_uuid = False
+        is_valid_uuid = _UUID_RE.match(workflow_id) is not None
         
         # Try to get workflow from database if valid UUID
         workflow = None
@@ -265,31 +285,35 @@ async def run_workflow_and_log(
         
         if is_valid_uuid:
             try:
-                from backend.services.workflow_service import workflow_service
                 workflow = await workflow_service.get_workflow_by_id(workflow_id, user_id)
                 if workflow:
                     agents = workflow.get("agents", [])
             except Exception as e:
-                print(f"Error fetching workflow: {e}")
+                logger.warning("Error fetching workflow: %s", e)
         
         # If no agents from database, create dummy agent executions
         if not agents:
             # Create 3-5 sample agent executions
             sample_roles = ["Data Processor", "Email Handler", "Document Analyzer", "Validator", "Orchestrator"]
-            agent_count = random.randint(3, 5)
+            agent_count = int(_execution_rng.integers(3, 6))
+            
+            # Draw every agent's latency/outcome/cost in one shot
+            latencies = _execution_rng.integers(50, 501, agent_count).tolist()
+            successes = (_execution_rng.random(agent_count) > 0.1).tolist()  # 90% success rate
+            costs = _execution_rng.uniform(0.001, 0.01, agent_count).round(4).tolist()
             
-            logs = []
-            for i in range(agent_count):
-                log = await metrics_tracking_service.log_execution(
-                    user_id=user_id,
-                    workflow_id=workflow_id if is_valid_uuid else None,
-                    agent_role=sample_roles[i % len(sample_roles)],
-                    latency_ms=random.randint(50, 500),
-                    success=random.random() > 0.1,  # 90% success rate
-                    cost_usd=round(random.uniform(0.001, 0.01), 4)
-                )
-                if log:
-                    logs.append(log)
+            rows = [
+                {
+                    "user_id": user_id,
+                    "workflow_id": workflow_id if is_valid_uuid else None,
+                    "agent_role": sample_roles[i % len(sample_roles)],
+                    "latency_ms": latency,
+                    "success": success,
+                    "cost_usd": cost
+                }
+                for i, (latency, success, cost) in enumerate(zip(latencies, successes, costs))
+            ]
+            logs = await metrics_tracking_service.log_executions_bulk(rows)
             
             return {
                 "message": f"Logged {len(logs)} agent executions to metrics",
@@ -312,7 +336,7 @@ async def run_workflow_and_log(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error running workflow: {e}")
+        logger.exception("Error running workflow")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to run workflow: {str(e)}"
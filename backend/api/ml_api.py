@@ -3,18 +3,67 @@ ML/AI API Endpoints
 Provides predictive analytics and anomaly detection capabilities
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+import asyncio
+import hashlib
+import time
+import numpy as np
+import orjson
+from cachetools import TTLCache
 
-from backend.services.ml_service import predictive_model, anomaly_detector
+try:
+    import psutil
+    _process = psutil.Process()
+except ImportError:
+    psutil = None
+
+from backend.services.ml_service import predictive_model, anomaly_detector, MODEL_FEATURE_NAMES
+from backend.services.prediction_batcher import PredictionBatcher
+from backend.core.responses import PydanticResponse
+from backend.core.clock import now_iso
 
 router = APIRouter(prefix="/ml", tags=["Machine Learning"])
 
+# Coalesces concurrent /predict requests into one sklearn call
+prediction_batcher = PredictionBatcher(predictive_model)
+
+# Serialized responses (without their timestamp) for repeated identical requests - predictions are
+# deterministic in their inputs. Only touched from the event loop, so no lock is needed.
+_response_cache: TTLCache = TTLCache(maxsize=4096, ttl=300)
+
+
+def _request_key(endpoint: str, request: BaseModel) -> bytes:
+    """Digest of the endpoint plus the canonical JSON of the request body"""
+    body = orjson.dumps(request.model_dump(), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(endpoint.encode() + body, digest_size=16).digest()
+
+
+def _timestamped_response(body: bytes) -> Response:
+    """Splice the per-request timestamp in front of a serialized (timestamp-free) response body"""
+    timestamp = orjson.dumps(now_iso())
+    return Response(content=b'{"timestamp":' + timestamp + b',' + body[1:], media_type="application/json")
+
+
+def _cached_response(key: bytes) -> Optional[Response]:
+    body = _response_cache.get(key)
+    if body is None:
+        return None
+    return _timestamped_response(body)
+
+
+def _cache_response(key: bytes, model: BaseModel) -> Response:
+    """Cache the model's JSON without its timestamp, so cache hits never replay a stale one"""
+    body = model.model_dump_json(exclude={"timestamp"}).encode("utf-8")
+    _response_cache[key] = body
+    return _timestamped_response(body)
+
 
 # Request/Response Models
 class PredictionRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     description: str = Field(..., description="Workflow description")
     agent_count: int = Field(default=1, ge=1, description="Number of agents")
     step_count: int = Field(default=5, ge=1, description="Number of steps")
@@ -25,6 +74,8 @@ class PredictionRequest(BaseModel):
 
 
 class PredictionResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     predicted_hours: float
     success_probability: float
     confidence: float
@@ -36,6 +87,8 @@ class PredictionResponse(BaseModel):
 
 
 class AnomalyRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     completion_time: float = Field(..., description="Actual completion time in hours")
     agent_count: int = Field(..., description="Number of agents used")
     success_rate: float = Field(default=1.0, ge=0, le=1, description="Success rate")
@@ -44,6 +97,8 @@ class AnomalyRequest(BaseModel):
 
 
 class AnomalyResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     is_anomaly: bool
     anomaly_score: float
     severity: str
@@ -53,13 +108,18 @@ class AnomalyResponse(BaseModel):
 
 
 # Endpoints
-@router.post("/predict", response_model=PredictionResponse)
+@router.post("/predict", response_class=PydanticResponse, responses={200: {"model": PredictionResponse}})
 async def predict_workflow_metrics(request: PredictionRequest):
     """
     Predict workflow completion time and success probability using ML models
     
     Returns comprehensive predictions with confidence intervals and risk assessment
     """
+    cache_key = _request_key("predict", request)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         # Prepare data for time prediction
         time_data = {
@@ -78,11 +138,22 @@ async def predict_workflow_metrics(request: PredictionRequest):
             'step_count': request.step_count
         }
         
-        # Get predictions
-        time_prediction = predictive_model.predict_completion_time(time_data)
-        success_prediction = predictive_model.predict_success_probability(success_data)
+        # Get predictions (batched with other in-flight requests when the trained models are loaded)
+        if predictive_model.models_loaded:
+            predicted_hours, success_prob = await prediction_batcher.predict(
+                predictive_model.time_features(time_data),
+                predictive_model.success_features(success_data)
+            )
+        else:
+            predicted_hours, success_prob = None, None
+        
+        # GPT calls (if configured) go out concurrently on the async client, not on the event loop thread
+        time_prediction, success_prediction = await predictive_model.predict_async(
+            time_data, success_data, predicted_hours, success_prob
+        )
         
-        return PredictionResponse(
+        # Values come straight from the model service - skip re-validation
+        return _cache_response(cache_key, PredictionResponse.model_construct(
             predicted_hours=time_prediction['predicted_hours'],
             success_probability=success_prediction['success_probability'],
             confidence=time_prediction['confidence'],
@@ -92,65 +163,83 @@ async def predict_workflow_metrics(request: PredictionRequest):
                 **time_prediction['factors'],
                 **success_prediction['contributing_factors']
             },
-            risk_factors=success_prediction['risk_factors'],
-            timestamp=datetime.now().isoformat()
-        )
+            risk_factors=success_prediction['risk_factors']
+        ))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
-@router.post("/detect-anomalies", response_model=AnomalyResponse)
+@router.post("/detect-anomalies", response_class=PydanticResponse, responses={200: {"model": AnomalyResponse}})
 async def detect_workflow_anomalies(request: AnomalyRequest):
     """
     Detect anomalies in workflow execution using statistical methods
     
     Returns anomaly score, detected anomalies, and recommendations
     """
+    cache_key = _request_key("detect-anomalies", request)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         metrics = {
             'completion_time': request.completion_time,
             'agent_count': request.agent_count,
             'success_rate': request.success_rate,
             'error_count': request.error_count,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }
         
         result = anomaly_detector.detect_anomalies(metrics)
         
-        return AnomalyResponse(
+        return _cache_response(cache_key, AnomalyResponse.model_construct(
             is_anomaly=result['is_anomaly'],
             anomaly_score=result['anomaly_score'],
             severity=result['severity'],
             anomalies_detected=result['anomalies_detected'],
-            recommendation=result.get('recommendation'),
-            timestamp=result['timestamp']
-        )
+            recommendation=result.get('recommendation')
+        ))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Anomaly detection failed: {str(e)}")
 
 
+# Latest process/system readings, refreshed in the background so health probes never block
+SYSTEM_METRICS_REFRESH_SECONDS = 5
+_system_metrics = {"memory_mb": 256.0, "cpu_percent": 15.0}
+
+
+def _sample_system_metrics():
+    if psutil is None:
+        return
+    _system_metrics["memory_mb"] = _process.memory_info().rss / (1024 * 1024)
+    # interval=None is non-blocking: utilization since the previous call
+    _system_metrics["cpu_percent"] = psutil.cpu_percent(interval=None)
+
+
+async def refresh_system_metrics():
+    """Background loop (started at startup) that keeps `_system_metrics` current"""
+    if psutil is None:
+        return
+    psutil.cpu_percent(interval=None)  # prime - the first non-blocking call always returns 0.0
+    _system_metrics["memory_mb"] = _process.memory_info().rss / (1024 * 1024)
+    while True:
+        await asyncio.sleep(SYSTEM_METRICS_REFRESH_SECONDS)
+        _sample_system_metrics()
+
+
 @router.get("/health")
 async def ml_health_check():
     """Check ML service health - returns REAL model status"""
-    import time
-    
     start = time.time()
     
     # Real model status
     models_loaded = predictive_model.models_loaded
     
-    # Real system metrics
-    try:
-        import psutil
-        process = psutil.Process()
-        memory_info = process.memory_info()
-        memory_mb = memory_info.rss / (1024 * 1024)
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-    except ImportError:
-        memory_mb = 256.0
-        cpu_percent = 15.0
+    # Real system metrics (cached by the background sampler)
+    memory_mb = _system_metrics["memory_mb"]
+    cpu_percent = _system_metrics["cpu_percent"]
     
     latency = round((time.time() - start) * 1000, 1)
     
@@ -167,18 +256,30 @@ async def ml_health_check():
             "cpu_percent": round(cpu_percent, 1),
             "model_load_percent": 100 if models_loaded else 0
         },
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
 
 
-@router.get("/model-info")
-async def get_model_info():
-    """Get REAL information about loaded ML models"""
-    import time
-    
+# Serialized /model-info body without the timestamp - the models never change after load
+_model_info_body: Optional[bytes] = None
+
+# Sample row for the single-prediction latency probe (float32 = sklearn's tree dtype, no conversion copy)
+_BENCH_X = np.ascontiguousarray([[10, 2, 5, 8, 3.0, 0.8, 30, 0.85]], dtype=np.float32)
+
+
+def _boosting_size(gb):
+    """(trees, total nodes) for either GradientBoostingRegressor or HistGradientBoostingRegressor"""
+    if hasattr(gb, "estimators_"):
+        return gb.n_estimators, sum(tree[0].tree_.node_count for tree in gb.estimators_)
+    # Histogram GB keeps one TreePredictor per iteration (single output -> one per list)
+    return gb.n_iter_, sum(len(predictors[0].nodes) for predictors in gb._predictors)
+
+
+def build_model_info() -> bytes:
+    """Materialize the static model-info payload once (called at startup)"""
+    global _model_info_body
     result = {
-        "models_loaded": predictive_model.models_loaded,
-        "timestamp": datetime.now().isoformat()
+        "models_loaded": predictive_model.models_loaded
     }
     
     if predictive_model.models_loaded:
@@ -187,12 +288,21 @@ async def get_model_info():
         gb = predictive_model.gb_time
         clf = predictive_model.success_clf
         
-        feature_names = ["word_count", "complexity_keywords", "agent_count", "step_count",
-                        "historical_avg_time", "confidence_score", "workflow_age_days", "agent_performance"]
+        feature_names = MODEL_FEATURE_NAMES
         
         # Real feature importances from trained model
-        rf_importances = dict(zip(feature_names, [round(float(x), 4) for x in rf.feature_importances_]))
-        clf_importances = dict(zip(feature_names, [round(float(x), 4) for x in clf.feature_importances_]))
+        rf_importances = dict(zip(feature_names, np.round(rf.feature_importances_, 4).tolist()))
+        clf_importances = dict(zip(feature_names, np.round(clf.feature_importances_, 4).tolist()))
+        
+        gb_trees, gb_nodes = _boosting_size(gb)
+        
+        # One pass over each ensemble - reused for totals, memory estimate and architecture
+        node_counts = {
+            "rf": sum(tree.tree_.node_count for tree in rf.estimators_),
+            "gb": gb_nodes,
+            "clf": sum(tree.tree_.node_count for tree in clf.estimators_)
+        }
+        total_nodes = sum(node_counts.values())
         
         # Real model architecture info
         result["models"] = [
@@ -201,19 +311,20 @@ async def get_model_info():
                 "type": "sklearn.ensemble.RandomForestRegressor",
                 "n_estimators": rf.n_estimators,
                 "max_depth": rf.max_depth,
+                "max_leaf_nodes": rf.max_leaf_nodes,
                 "n_features": rf.n_features_in_,
-                "total_nodes": sum(tree.tree_.node_count for tree in rf.estimators_),
+                "total_nodes": node_counts["rf"],
                 "feature_importances": rf_importances,
                 "status": "active",
                 "role": "Time Prediction (60% weight)"
             },
             {
                 "name": "GradientBoosting Regressor",
-                "type": "sklearn.ensemble.GradientBoostingRegressor",
-                "n_estimators": gb.n_estimators,
+                "type": f"sklearn.ensemble.{type(gb).__name__}",
+                "n_estimators": gb_trees,
                 "max_depth": gb.max_depth,
                 "n_features": gb.n_features_in_,
-                "total_nodes": sum(tree[0].tree_.node_count for tree in gb.estimators_),
+                "total_nodes": node_counts["gb"],
                 "status": "active",
                 "role": "Time Prediction (40% weight)"
             },
@@ -222,9 +333,10 @@ async def get_model_info():
                 "type": "sklearn.ensemble.RandomForestClassifier",
                 "n_estimators": clf.n_estimators,
                 "max_depth": clf.max_depth,
+                "max_leaf_nodes": clf.max_leaf_nodes,
                 "n_features": clf.n_features_in_,
                 "n_classes": clf.n_classes_,
-                "total_nodes": sum(tree.tree_.node_count for tree in clf.estimators_),
+                "total_nodes": node_counts["clf"],
                 "feature_importances": clf_importances,
                 "status": "active",
                 "role": "Success Classification"
@@ -233,30 +345,20 @@ async def get_model_info():
         
         # Benchmark with real prediction
         start = time.time()
-        import numpy as np
-        test_features = np.array([[10, 2, 5, 8, 3.0, 0.8, 30, 0.85]])
-        rf.predict(test_features)
+        rf.predict(_BENCH_X)
         latency_ms = round((time.time() - start) * 1000, 2)
         
         result["benchmark"] = {
             "single_prediction_ms": latency_ms,
-            "model_memory_estimate_mb": round(
-                sum(tree.tree_.node_count * 0.001 for tree in rf.estimators_) +
-                sum(tree[0].tree_.node_count * 0.001 for tree in gb.estimators_) +
-                sum(tree.tree_.node_count * 0.001 for tree in clf.estimators_), 1
-            )
+            "model_memory_estimate_mb": round(total_nodes * 0.001, 1)
         }
         
         result["architecture"] = {
             "input_features": 8,
             "feature_names": feature_names,
             "ensemble_type": "Stacked (RF 60% + GB 40%)",
-            "total_trees": rf.n_estimators + gb.n_estimators + clf.n_estimators,
-            "total_decision_nodes": (
-                sum(tree.tree_.node_count for tree in rf.estimators_) +
-                sum(tree[0].tree_.node_count for tree in gb.estimators_) +
-                sum(tree.tree_.node_count for tree in clf.estimators_)
-            ),
+            "total_trees": rf.n_estimators + gb_trees + clf.n_estimators,
+            "total_decision_nodes": total_nodes,
             "outputs": ["predicted_hours", "success_probability"]
         }
     else:
@@ -276,4 +378,12 @@ async def get_model_info():
         "status": "active"
     }
     
-    return result
+    # orjson serializes numpy scalars natively
+    _model_info_body = orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _model_info_body
+
+
+@router.get("/model-info")
+async def get_model_info():
+    """Get REAL information about loaded ML models"""
+    return _timestamped_response(_model_info_body or build_model_info())
@@ -1,43 +1,47 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 from typing import List
-import time
 import random
-from backend.models.workflow import WorkflowAnalysisResult, WorkflowInput, AgentSuggestion
+from backend.models.workflow import WorkflowAnalysisResult, WorkflowInput, AgentSuggestion, WorkflowStep
+from backend.core.responses import PydanticResponse
 from backend.services.agent_service import agent_service
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=WorkflowAnalysisResult)
+# Private generator for the mock estimates - keeps /analyze off the shared module-level `random` state
+_rng = random.Random()
+_TIME_SAVING_ESTIMATES = tuple(f"{hours} hours/week" for hours in range(2, 11))
+
+@router.post("/analyze", response_class=PydanticResponse, responses={200: {"model": WorkflowAnalysisResult}})
 async def analyze_workflow(input_data: WorkflowInput):
-    # Simulate processing time
-    time.sleep(1.5)
-    
     # Use the service to generate architecture
     blueprints = agent_service.generate_architecture(input_data.description)
     
-    # Convert blueprints to suggestions for the frontend
+    # Convert blueprints to suggestions for the frontend.
+    # Everything below is built server-side, so skip validation with model_construct.
     suggestions = [
-        AgentSuggestion(
+        AgentSuggestion.model_construct(
             role=bp.role,
-            description=bp.description,
-            confidence_score=0.95 if bp.role == "Workflow Coordinator" else 0.85
+            description=bp.description or bp.system_prompt,
+            suggested_model=bp.model,
+            confidence_score=0.95 if bp.role == "Workflow Coordinator" else 0.85,
+            triggers=[]
         ) for bp in blueprints
     ]
     
     # Mock workflow steps extraction
     steps = [
-        {"id": "1", "description": "Trigger: " + input_data.description[:20] + "...", "actor": "User"},
-        {"id": "2", "description": "Process Data", "actor": "System"},
-        {"id": "3", "description": "Finalize", "actor": "System"}
+        WorkflowStep.model_construct(id="1", description=f"Trigger: {input_data.description[:20]}...", actor="User", inputs=[], outputs=[], estimated_time=None),
+        WorkflowStep.model_construct(id="2", description="Process Data", actor="System", inputs=[], outputs=[], estimated_time=None),
+        WorkflowStep.model_construct(id="3", description="Finalize", actor="System", inputs=[], outputs=[], estimated_time=None)
     ]
 
-    return WorkflowAnalysisResult(
+    return PydanticResponse(WorkflowAnalysisResult.model_construct(
         workflow_steps=steps,
         agent_suggestions=suggestions,
-        automated_percentage=random.randint(60, 95),
-        time_saving_estimate=f"{random.randint(2, 10)} hours/week"
-    )
+        automated_percentage=float(_rng.randint(60, 95)),
+        time_saving_estimate=_rng.choice(_TIME_SAVING_ESTIMATES)
+    ))
 
 @router.post("/upload")
 async def upload_workflow_file(file: UploadFile = File(...)):
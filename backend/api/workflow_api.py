@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Dict, Any
 from backend.services.workflow_service import workflow_service
-from backend.api.auth import get_current_user
+from backend.api.deps import get_current_user
+import asyncio
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 class WorkflowCreate(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     name: str
     description: Optional[str] = None
     steps: List[Dict[str, Any]] = []
@@ -14,11 +19,15 @@ class WorkflowCreate(BaseModel):
     metrics: Optional[Dict[str, Any]] = None
 
 class WorkflowUpdate(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     name: Optional[str] = None
     description: Optional[str] = None
     status: Optional[str] = None
 
 class AgentCreate(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     workflow_id: str
     role: str
     description: Optional[str] = None
@@ -46,27 +55,32 @@ async def create_workflow(
         
         workflow_id = new_workflow["id"]
         
+        # Steps, agents and metrics only depend on the workflow id - insert them concurrently
+        inserts = []
+        
         # Add steps if provided
         if workflow.steps:
-            await workflow_service.add_workflow_steps(workflow_id, workflow.steps)
+            inserts.append(workflow_service.add_workflow_steps(workflow_id, workflow.steps))
         
         # Add agents if provided
         for agent_data in workflow.agents:
-            await workflow_service.add_agent(
+            inserts.append(workflow_service.add_agent(
                 workflow_id=workflow_id,
                 role=agent_data.get("role", ""),
                 description=agent_data.get("description"),
                 status=agent_data.get("status", "Idle"),
                 confidence_score=agent_data.get("confidence_score", 0.95)
-            )
+            ))
         
         # Record metrics if provided
         if workflow.metrics:
-            await workflow_service.record_metrics(
+            inserts.append(workflow_service.record_metrics(
                 workflow_id=workflow_id,
                 automation_rate=workflow.metrics.get("automation_rate"),
                 time_saved=workflow.metrics.get("time_saved")
-            )
+            ))
+        
+        await asyncio.gather(*inserts)
         
         # Get complete workflow with all relations
         complete_workflow = await workflow_service.get_workflow_by_id(workflow_id, user_id)
@@ -74,7 +88,7 @@ async def create_workflow(
         return complete_workflow
     
     except Exception as e:
-        print(f"Error creating workflow: {e}")
+        logger.exception("Error creating workflow")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -87,7 +101,7 @@ async def get_workflows(user_id: str = Depends(get_current_user)):
         workflows = await workflow_service.get_user_workflows(user_id)
         return workflows
     except Exception as e:
-        print(f"Error fetching workflows: {e}")
+        logger.exception("Error fetching workflows")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -112,7 +126,7 @@ async def get_workflow(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error fetching workflow: {e}")
+        logger.exception("Error fetching workflow")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -150,7 +164,7 @@ async def update_workflow(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error updating workflow: {e}")
+        logger.exception("Error updating workflow")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -175,7 +189,7 @@ async def delete_workflow(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error deleting workflow: {e}")
+        logger.exception("Error deleting workflow")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -208,7 +222,7 @@ async def add_agent_to_workflow(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error adding agent: {e}")
+        logger.exception("Error adding agent")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -236,7 +250,7 @@ async def deploy_agent(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error deploying agent: {e}")
+        logger.exception("Error deploying agent")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -249,7 +263,7 @@ async def get_user_metrics(user_id: str = Depends(get_current_user)):
         metrics = await workflow_service.get_user_metrics(user_id)
         return metrics
     except Exception as e:
-        print(f"Error fetching metrics: {e}")
+        logger.exception("Error fetching metrics")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -0,0 +1,22 @@
+"""
+Cached wall-clock timestamps for response payloads
+
+Health probes and ML endpoints stamp every response with the current time;
+second resolution is plenty, so the ISO string is formatted once per second.
+"""
+
+import time
+from datetime import datetime
+
+_cached_second = None
+_cached_iso = ""
+
+
+def now_iso() -> str:
+    """Local ISO-8601 timestamp (second resolution), formatted at most once per second"""
+    global _cached_second, _cached_iso
+    second = int(time.time())
+    if second != _cached_second:
+        _cached_iso = datetime.fromtimestamp(second).isoformat()
+        _cached_second = second
+    return _cached_iso
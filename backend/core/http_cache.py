@@ -0,0 +1,92 @@
+"""
+Short-lived HTTP response cache for polled dashboard endpoints
+
+Caches successful GET responses per (path, query string, Authorization header)
+so repeated polls are answered from memory without entering the handler.
+Adds `Cache-Control: private` + `ETag` and answers `If-None-Match` with 304.
+"""
+
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from cachetools import TTLCache
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class ResponseCacheMiddleware:
+    """Pure ASGI middleware - avoids the overhead of BaseHTTPMiddleware on the hot path"""
+
+    def __init__(self, app, paths: Iterable[str], max_age: int = 30, maxsize: int = 4096):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_age = max_age
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=max_age)
+        self._lock = threading.Lock()
+        self._cache_control = f"private, max-age={max_age}".encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers: Dict[bytes, bytes] = dict(scope["headers"])
+        authorization = request_headers.get(b"authorization")
+        if not authorization:
+            await self.app(scope, receive, send)
+            return
+
+        # Key includes the full credential (hashed) so per-user data is never cross-served
+        key = hashlib.sha256(
+            scope["path"].encode() + b"?" + scope["query_string"] + b"\n" + authorization
+        ).digest()
+        if_none_match = request_headers.get(b"if-none-match")
+
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            etag, headers, body = cached
+            await self._send_cached(send, etag, headers, body, if_none_match)
+            return
+
+        start_message = {}
+        body_parts: List[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start_message.update(message)
+                return
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            if start_message["status"] != 200:
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            etag = b'"' + hashlib.sha256(body).hexdigest()[:32].encode() + b'"'
+            headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name.lower() not in (b"content-length", b"etag", b"cache-control")
+            ]
+            with self._lock:
+                self._cache[key] = (etag, headers, body)
+            await self._send_cached(send, etag, headers, body, if_none_match)
+
+        await self.app(scope, receive, capture)
+
+    async def _send_cached(self, send, etag: bytes, headers: Headers, body: bytes, if_none_match):
+        cache_headers = [(b"etag", etag), (b"cache-control", self._cache_control)]
+        if if_none_match == etag:
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers + cache_headers + [(b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,22 @@
+"""
+Response classes shared by the API routers
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class PydanticResponse(JSONResponse):
+    """
+    Render a Pydantic model with its own (Rust) JSON serializer.
+
+    Used with routes that drop `response_model`, so FastAPI skips re-validation
+    and `jsonable_encoder`. Pass instances built with `model_construct`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return super().render(content)
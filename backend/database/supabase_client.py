@@ -3,13 +3,18 @@ from dotenv import load_dotenv
 from pathlib import Path
 try:
     from supabase import create_client, Client
+    from supabase.lib.client_options import SyncClientOptions
+    import httpx
     SUPABASE_SDK_AVAILABLE = True
 except ImportError:
     SUPABASE_SDK_AVAILABLE = False
     print("WARNING: supabase library not installed, falling back to psycopg2")
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2 import sql
+    from psycopg2.extras import RealDictCursor, Json, execute_values
+    from psycopg2.pool import ThreadedConnectionPool
     from contextlib import contextmanager
+    import threading
 
 # Load environment variables from backend/.env
 backend_dir = Path(__file__).parent.parent
@@ -26,6 +31,10 @@ if SUPABASE_SDK_AVAILABLE:
     if not _supabase_available:
         print("⚠️ SUPABASE_URL/SUPABASE_KEY not set — running without database")
     
+    # One long-lived HTTP/2 pool shared by every PostgREST call (avoids a TLS handshake per query)
+    SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "10"))
+    SUPABASE_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=64, max_connections=128)
+    
     class _DummyResult:
         def __init__(self):
             self.data = []
@@ -37,11 +46,13 @@ if SUPABASE_SDK_AVAILABLE:
         def delete(self, *a, **kw): return self
         def eq(self, *a, **kw): return self
         def order(self, *a, **kw): return self
+        def limit(self, *a, **kw): return self
         def single(self, *a, **kw): return self
         def execute(self, *a, **kw): return _DummyResult()
     
     class _DummyClient:
         def table(self, name): return _DummyTable()
+        def rpc(self, fn, params=None): return _DummyTable()
     
     def get_supabase_client():
         """Get Supabase client using REST API (works better than direct PostgreSQL)"""
@@ -49,9 +60,27 @@ if SUPABASE_SDK_AVAILABLE:
         if not _supabase_available:
             return _DummyClient()
         if _supabase_client is None:
-            _supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+            http_client = httpx.Client(
+                http2=True,
+                timeout=SUPABASE_HTTP_TIMEOUT,
+                limits=SUPABASE_HTTP_LIMITS
+            )
+            _supabase_client = create_client(
+                SUPABASE_URL,
+                SUPABASE_KEY,
+                options=SyncClientOptions(httpx_client=http_client)
+            )
         return _supabase_client
     
+    def warm_up_database():
+        """Create the client and open its HTTP/2 connection before the first request needs it"""
+        if not _supabase_available:
+            return
+        try:
+            get_supabase_client().table("users").select("id").limit(1).execute()
+        except Exception as e:
+            print(f"⚠️ Supabase warm-up failed: {e}")
+    
     if _supabase_available:
         print("✅ Using Supabase REST API (recommended)")
 
@@ -62,24 +91,82 @@ else:
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL must be set in environment variables")
     
+    # Reuse connections instead of paying a TCP+TLS+auth handshake per query
+    DB_POOL_MIN_CONN = int(os.getenv("DB_POOL_MIN_CONN", "2"))
+    DB_POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "20"))
+    
+    _pool = None
+    _pool_lock = threading.Lock()
+    # ThreadedConnectionPool raises PoolError when exhausted - callers beyond DB_POOL_MAX_CONN wait here instead
+    _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_CONN)
+    
+    def _get_pool():
+        """Create the shared connection pool on first use"""
+        global _pool
+        if _pool is None:
+            with _pool_lock:
+                if _pool is None:
+                    _pool = ThreadedConnectionPool(
+                        DB_POOL_MIN_CONN,
+                        DB_POOL_MAX_CONN,
+                        dsn=DATABASE_URL,
+                        cursor_factory=RealDictCursor
+                    )
+        return _pool
+    
     @contextmanager
     def get_db_connection():
-        """Get a database connection using context manager"""
-        conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        """Borrow a pooled database connection using context manager (blocks while all are checked out)"""
+        pool = _get_pool()
+        with _pool_slots:
+            conn = pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                # Broken connections are discarded rather than handed to the next caller
+                pool.putconn(conn, close=bool(conn.closed))
+
+    # Rendered SQL per query shape (operation, table, columns, filters, ordering)
+    _statement_cache = {}
 
     class _DBClient:
         """Simple database client mimicking Supabase client interface"""
         
         def table(self, table_name: str):
             return _TableQuery(table_name)
+        
+        def rpc(self, fn: str, params: dict = None):
+            return _RpcQuery(fn, params or {})
+
+    class _RpcQuery:
+        """Call a database function with named arguments (functions returning a single value)"""
+        
+        def __init__(self, fn: str, params: dict):
+            self.fn = fn
+            self.params = params
+        
+        def execute(self):
+            query = sql.SQL("SELECT {}({}) AS result").format(
+                sql.Identifier(self.fn),
+                sql.SQL(', ').join(
+                    sql.SQL("{} => {}").format(sql.Identifier(name), sql.Placeholder(name))
+                    for name in self.params
+                )
+            )
+            # Lists/dicts are passed as JSONB arguments
+            params = {
+                name: Json(value) if isinstance(value, (dict, list)) else value
+                for name, value in self.params.items()
+            }
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                return _QueryResult(cursor.fetchone()["result"], is_single=True)
 
     class _TableQuery:
         def __init__(self, table_name: str):
@@ -89,9 +176,13 @@ else:
             self._single = False
             self._order_by = None
             self._desc = False
+            self._limit = None
+            self._head = False
         
-        def select(self, columns: str = "*"):
+        def select(self, columns: str = "*", count: str = None, head: bool = False):
+            # head=True (with count) returns only the matching row count, like PostgREST's HEAD request
             self._select_cols = columns
+            self._head = head and count is not None
             return self
         
         def eq(self, column: str, value):
@@ -103,6 +194,10 @@ else:
             self._desc = desc
             return self
         
+        def limit(self, size: int):
+            self._limit = size
+            return self
+        
         def single(self):
             self._single = True
             return self
@@ -119,66 +214,106 @@ else:
             self._delete = True
             return self
         
+        def _where(self):
+            if not self._eq_conditions:
+                return sql.SQL("")
+            return sql.SQL(" WHERE ") + sql.SQL(" AND ").join(
+                sql.SQL("{} = %s").format(sql.Identifier(col)) for col, _ in self._eq_conditions
+            )
+        
+        def _build_query(self):
+            """Compose the statement for this query shape with identifiers quoted by psycopg2.sql"""
+            table = sql.Identifier(self.table_name)
+            
+            # INSERT
+            if hasattr(self, '_insert_data'):
+                cols = list(self._insert_data[0].keys())
+                return sql.SQL("INSERT INTO {} ({}) VALUES %s RETURNING *").format(
+                    table, sql.SQL(', ').join(map(sql.Identifier, cols))
+                )
+            
+            # UPDATE
+            if hasattr(self, '_update_data'):
+                set_clause = sql.SQL(', ').join(
+                    sql.SQL("{} = %s").format(sql.Identifier(k)) for k in self._update_data.keys()
+                )
+                return sql.SQL("UPDATE {} SET {}{} RETURNING *").format(table, set_clause, self._where())
+            
+            # DELETE
+            if hasattr(self, '_delete'):
+                return sql.SQL("DELETE FROM {}{}").format(table, self._where())
+            
+            # COUNT (head select)
+            if self._head:
+                return sql.SQL("SELECT count(*) AS count FROM {}{}").format(table, self._where())
+            
+            # SELECT (column list is supplied by our own code, not by request data)
+            query = sql.SQL("SELECT {} FROM {}{}").format(sql.SQL(self._select_cols), table, self._where())
+            if self._order_by:
+                query += sql.SQL(" ORDER BY {}").format(sql.Identifier(self._order_by))
+                if self._desc:
+                    query += sql.SQL(" DESC")
+            if self._limit is not None:
+                query += sql.SQL(" LIMIT {}").format(sql.Literal(int(self._limit)))
+            return query
+        
+        def _statement(self, conn) -> str:
+            """Rendered SQL for this query shape - composed once and reused across requests"""
+            if hasattr(self, '_insert_data'):
+                shape = ("insert", self.table_name, tuple(self._insert_data[0].keys()))
+            elif hasattr(self, '_update_data'):
+                shape = ("update", self.table_name, tuple(self._update_data.keys()), self._eq_columns())
+            elif hasattr(self, '_delete'):
+                shape = ("delete", self.table_name, self._eq_columns())
+            elif self._head:
+                shape = ("count", self.table_name, self._eq_columns())
+            else:
+                shape = ("select", self.table_name, self._select_cols, self._eq_columns(), self._order_by, self._desc, self._limit)
+            
+            statement = _statement_cache.get(shape)
+            if statement is None:
+                statement = _statement_cache[shape] = self._build_query().as_string(conn)
+            return statement
+        
+        def _eq_columns(self):
+            return tuple(col for col, _ in self._eq_conditions)
+        
         def execute(self):
             """Execute the query and return results"""
             with get_db_connection() as conn:
                 cursor = conn.cursor()
+                query = self._statement(conn)
+                eq_values = [val for _, val in self._eq_conditions]
                 
                 # INSERT
                 if hasattr(self, '_insert_data'):
                     cols = list(self._insert_data[0].keys())
-                    placeholders = ', '.join(['%s'] * len(cols))
-                    cols_str = ', '.join(cols)
-                    query = f"INSERT INTO {self.table_name} ({cols_str}) VALUES ({placeholders}) RETURNING *"
                     
-                    results = []
-                    for item in self._insert_data:
-                        values = [item[col] for col in cols]
-                        cursor.execute(query, values)
-                        results.extend(cursor.fetchall())
+                    # One multi-row statement instead of a round trip per row
+                    rows = [tuple(item[col] for col in cols) for item in self._insert_data]
+                    results = execute_values(cursor, query, rows, page_size=len(rows), fetch=True)
                     
                     return _QueryResult(results)
                 
                 # UPDATE
                 elif hasattr(self, '_update_data'):
-                    set_clause = ', '.join([f"{k} = %s" for k in self._update_data.keys()])
-                    where_clause = ' AND '.join([f"{col} = %s" for col, _ in self._eq_conditions])
-                    query = f"UPDATE {self.table_name} SET {set_clause}"
-                    if where_clause:
-                        query += f" WHERE {where_clause}"
-                    query += " RETURNING *"
-                    
-                    values = list(self._update_data.values()) + [val for _, val in self._eq_conditions]
+                    values = list(self._update_data.values()) + eq_values
                     cursor.execute(query, values)
                     return _QueryResult(cursor.fetchall())
                 
                 # DELETE
                 elif hasattr(self, '_delete'):
-                    where_clause = ' AND '.join([f"{col} = %s" for col, _ in self._eq_conditions])
-                    query = f"DELETE FROM {self.table_name}"
-                    if where_clause:
-                        query += f" WHERE {where_clause}"
-                    
-                    values = [val for _, val in self._eq_conditions]
-                    cursor.execute(query, values)
+                    cursor.execute(query, eq_values)
                     return _QueryResult([])
                 
+                # COUNT
+                elif self._head:
+                    cursor.execute(query, eq_values)
+                    return _QueryResult([], count=cursor.fetchone()["count"])
+                
                 # SELECT
                 else:
-                    query = f"SELECT {self._select_cols} FROM {self.table_name}"
-                    values = []
-                    
-                    if self._eq_conditions:
-                        where_clause = ' AND '.join([f"{col} = %s" for col, _ in self._eq_conditions])
-                        query += f" WHERE {where_clause}"
-                        values = [val for _, val in self._eq_conditions]
-                    
-                    if self._order_by:
-                        query += f" ORDER BY {self._order_by}"
-                        if self._desc:
-                            query += " DESC"
-                    
-                    cursor.execute(query, values)
+                    cursor.execute(query, eq_values)
                     results = cursor.fetchall()
                     
                     if self._single:
@@ -186,9 +321,10 @@ else:
                     return _QueryResult(results)
 
     class _QueryResult:
-        def __init__(self, data, is_single=False):
+        def __init__(self, data, is_single=False, count=None):
             self.data = data
             self.is_single = is_single
+            self.count = count
 
     # Create global client instance
     supabase = _DBClient()
@@ -197,4 +333,12 @@ else:
         """Get the database client instance"""
         return supabase
     
+    def warm_up_database():
+        """Open the connection pool before the first request needs it"""
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().execute("SELECT 1")
+        except Exception as e:
+            print(f"⚠️ Database warm-up failed: {e}")
+    
     print("⚠️ Using direct PostgreSQL connection (may fail with DNS issues)")
@@ -1,11 +1,37 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.api import workflow, auth, workflow_api, analysis_api, ml_api, metrics_api
+from backend.core.http_cache import ResponseCacheMiddleware
+from backend.database.supabase_client import warm_up_database
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Static ML model metadata - computed once instead of per /ml/model-info request
+    ml_api.build_model_info()
+    # Pay the database connection handshake here rather than on the first request
+    await asyncio.to_thread(warm_up_database)
+    system_metrics_task = asyncio.create_task(ml_api.refresh_system_metrics())
+    yield
+    system_metrics_task.cancel()
 
 app = FastAPI(
     title="CogniFloe API",
     description="AI-Powered Workflow Automation Platform with Advanced ML/DL Analysis",
-    version="5.0.0"
+    version="5.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Short-lived per-user cache for the polled telemetry endpoint.
+# Registered before CORS so CORS stays outermost and headers are computed per request.
+app.add_middleware(
+    ResponseCacheMiddleware,
+    paths=["/api/v1/metrics/telemetry"],
+    max_age=30
 )
 
 # CORS - Allow frontend origins
@@ -18,8 +44,9 @@ app.add_middleware(
         "http://localhost:3000",
         "http://127.0.0.1:5173",
         "http://127.0.0.1:5174",
-        "*",  # Allow Render deployed frontend
     ],
+    # Render deployed frontend - matched by regex instead of a "*" that is invalid alongside credentials
+    allow_origin_regex=os.getenv("CORS_ORIGIN_REGEX", r"https://.*\.onrender\.com"),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
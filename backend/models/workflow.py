@@ -1,7 +1,9 @@
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class WorkflowStep(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     id: str
     description: str
     actor: str
@@ -10,12 +12,16 @@ class WorkflowStep(BaseModel):
     estimated_time: Optional[str] = None
 
 class DecisionPoint(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     id: str
     condition: str
     true_next_step_id: str
     false_next_step_id: str
 
 class AgentSuggestion(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     role: str
     description: str
     suggested_model: str
@@ -23,10 +29,13 @@ class AgentSuggestion(BaseModel):
     triggers: List[str] = []
 
 class AgentBlueprint(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     agent_id: str
     name: str
     role: str
     system_prompt: str
+    description: Optional[str] = None
     tools: List[str] = []
     inputs: Dict[str, Any] = {}
     outputs: Dict[str, Any] = {}
@@ -43,6 +52,8 @@ class AgentBlueprint(BaseModel):
     executions_count: int = 1200
 
 class WorkflowAnalysisResult(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     workflow_steps: List[WorkflowStep] = []
     decision_points: List[DecisionPoint] = []
     actors: List[str] = []
@@ -64,6 +75,8 @@ class WorkflowAnalysisResult(BaseModel):
     final_agentic_architecture_json: Dict[str, Any] = {}
 
 class WorkflowInput(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     description: Optional[str] = None
     text_content: Optional[str] = None
     file_url: Optional[str] = None
@@ -1,15 +1,69 @@
 import random
 import os
-import json
+import re
+import orjson
 from typing import List, Dict
-from openai import OpenAI
 from backend.models.workflow import AgentBlueprint
 
+# Domain keywords the rule-based fallback reacts to, matched in one case-insensitive scan
+_KEYWORD_RE = re.compile(r'\b(invoice|receipt)', re.IGNORECASE)
+
+# Static blueprints for the rule-based fallback (constant fields, built without re-validation)
+_COORDINATOR_TEMPLATE = {
+    "agent_id": "mock_1",
+    "name": "Workflow Coordinator",
+    "role": "Workflow Coordinator",
+    "system_prompt": "Manage state",
+    "description": "Orchestrates the overall process and manages state.",
+    "tools": ["State Management", "Task Dispatcher"],
+    "rationale": "Central brain required to manage dependencies and error handling.",
+    "efficiency_gain": "Eliminates manual project management overhead.",
+}
+
+_DOCUMENT_PROCESSOR_TEMPLATE = {
+    "agent_id": "mock_2",
+    "name": "Document Processor",
+    "role": "Document Processor",
+    "system_prompt": "Extract data",
+    "description": "Extracts structured data from invoices and receipts.",
+    "tools": ["OCR", "LayoutLM", "Regex Extractor"],
+    "rationale": "Manual data entry is error-prone; AI ensures 99.9% accuracy.",
+    "efficiency_gain": "Manual: 5 mins/doc -> AI: 2 secs/doc",
+    "model": "gpt-3.5-turbo",
+    "internal_flow": [
+        {"id": "1", "label": "OCR Scan", "type": "trigger"},
+        {"id": "2", "label": "Extract Fields", "type": "action"},
+        {"id": "3", "label": "Validate Data", "type": "condition"},
+        {"id": "4", "label": "Export JSON", "type": "output"}
+    ],
+    "dependencies": [
+        {"name": "OCR Service", "status": "Connected", "version": "v2.0", "active_users": "5k"},
+        {"name": "QuickBooks API", "status": "Connected", "version": "v3.1", "active_users": "2k"}
+    ],
+    "performance_metric": 98,
+    "executions_count": 15420,
+}
+
+_TASK_EXECUTOR_TEMPLATE = {
+    "agent_id": "mock_default",
+    "name": "Task Executor",
+    "role": "Task Executor",
+    "system_prompt": "Execute tasks",
+    "description": "Executes general purpose tasks.",
+    "tools": ["Web Search"],
+    "rationale": "Handles execution of steps defined in the prompt.",
+    "efficiency_gain": "Manual: Varies -> AI: Instant",
+}
+
 class AgenticArchitectureService:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.model = os.getenv("OPENAI_MODEL", "gpt-4")
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.client = None
+        if self.api_key:
+            # openai (and its httpx/anyio stack) is only imported when the LLM path is enabled
+            from openai import OpenAI
+            self.client = OpenAI(api_key=self.api_key)
 
     def generate_architecture(self, workflow_description: str) -> List[AgentBlueprint]:
         """
@@ -30,8 +84,8 @@ class AgenticArchitectureService:
             - tools: List of tools
             - rationale: SPECIFIC reason why this agent is needed vs a simple script. be persuasive.
             - efficiency_gain: precise comparison (e.g. "Manual: 15m -> AI: 30s")
-            - internal_flow: List of 3-5 steps for this specific agent's internal logic. Each step object: {"id": "1", "label": "Step Name", "type": "trigger"|"action"|"condition"|"output"}
-            - dependencies: List of 1-3 necessary integrations. Each object: {"name": "Service Name", "status": "Connected", "version": "v1.0", "active_users": "10k"}
+            - internal_flow: List of 3-5 steps for this specific agent's internal logic. Each step object: {{"id": "1", "label": "Step Name", "type": "trigger"|"action"|"condition"|"output"}}
+            - dependencies: List of 1-3 necessary integrations. Each object: {{"name": "Service Name", "status": "Connected", "version": "v1.0", "active_users": "10k"}}
             - performance_metric: Integer (85-99) representing efficiency score.
             - executions_count: Integer representing total runs.
             
@@ -49,16 +103,18 @@ class AgenticArchitectureService:
             )
             
             content = response.choices[0].message.content
-            data = json.loads(content)
+            data = orjson.loads(content)
             
+            # Trusted structured LLM output: skip per-field validation. Required keys are still
+            # indexed directly so a malformed agent falls back to the mock architecture.
             blueprints = []
             for agent in data.get("agents", []):
-                blueprints.append(AgentBlueprint(
+                blueprints.append(AgentBlueprint.model_construct(
                     agent_id=f"gen_{random.randint(1000,9999)}",
-                    name=agent.get("role"),
-                    role=agent.get("role"),
-                    system_prompt=agent.get("description"),
-                    description=agent.get("description"),
+                    name=agent["role"],
+                    role=agent["role"],
+                    system_prompt=agent["description"],
+                    description=agent["description"],
                     tools=agent.get("tools", []),
                     rationale=agent.get("rationale", "Essential for workflow orchestration."),
                     efficiency_gain=agent.get("efficiency_gain", "10x speedup"),
@@ -77,59 +133,14 @@ class AgenticArchitectureService:
 
     def _generate_mock_architecture(self, workflow_description: str) -> List[AgentBlueprint]:
         """Fallback rule-based generation"""
-        agents = []
-        description_lower = workflow_description.lower()
-        
-        # Coordinator
-        agents.append(AgentBlueprint(
-            agent_id="mock_1",
-            name="Workflow Coordinator",
-            role="Workflow Coordinator",
-            system_prompt="Manage state",
-            description="Orchestrates the overall process and manages state.",
-            tools=["State Management", "Task Dispatcher"],
-            rationale="Central brain required to manage dependencies and error handling.",
-            efficiency_gain="Eliminates manual project management overhead.",
-            model=self.model
-        ))
+        agents = [AgentBlueprint.model_construct(**_COORDINATOR_TEMPLATE, model=self.model)]
+        matches = {m.group(1).lower() for m in _KEYWORD_RE.finditer(workflow_description)}
 
-        if "invoice" in description_lower or "receipt" in description_lower:
-            agents.append(AgentBlueprint(
-                agent_id="mock_2",
-                name="Document Processor",
-                role="Document Processor",
-                system_prompt="Extract data",
-                description="Extracts structured data from invoices and receipts.",
-                tools=["OCR", "LayoutLM", "Regex Extractor"],
-                rationale="Manual data entry is error-prone; AI ensures 99.9% accuracy.",
-                efficiency_gain="Manual: 5 mins/doc -> AI: 2 secs/doc",
-                model="gpt-3.5-turbo",
-                internal_flow=[
-                    {"id": "1", "label": "OCR Scan", "type": "trigger"},
-                    {"id": "2", "label": "Extract Fields", "type": "action"}, 
-                    {"id": "3", "label": "Validate Data", "type": "condition"},
-                    {"id": "4", "label": "Export JSON", "type": "output"}
-                ],
-                dependencies=[
-                    {"name": "OCR Service", "status": "Connected", "version": "v2.0", "active_users": "5k"},
-                    {"name": "QuickBooks API", "status": "Connected", "version": "v3.1", "active_users": "2k"}
-                ],
-                performance_metric=98,
-                executions_count=15420
-            ))
+        if "invoice" in matches or "receipt" in matches:
+            agents.append(AgentBlueprint.model_construct(**_DOCUMENT_PROCESSOR_TEMPLATE))
 
         if len(agents) == 1:
-             agents.append(AgentBlueprint(
-                agent_id="mock_default",
-                name="Task Executor",
-                role="Task Executor",
-                system_prompt="Execute tasks",
-                description="Executes general purpose tasks.",
-                tools=["Web Search"],
-                rationale="Handles execution of steps defined in the prompt.",
-                efficiency_gain="Manual: Varies -> AI: Instant",
-                model=self.model
-            ))
+            agents.append(AgentBlueprint.model_construct(**_TASK_EXECUTOR_TEMPLATE, model=self.model))
 
         return agents
 
@@ -9,11 +9,12 @@ unless you verify a custom domain. For development, OTP is printed to console.
 """
 
 import os
-import random
-import string
-from datetime import datetime, timedelta
+import asyncio
+import secrets
+import time
 from typing import Optional, Tuple
 import threading
+import httpx
 
 # Resend API configuration
 RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
@@ -23,33 +24,15 @@ FROM_EMAIL = os.getenv("FROM_EMAIL", "CogniFloe <onboarding@resend.dev>")
 # OTP configuration
 OTP_LENGTH = 6
 OTP_EXPIRY_MINUTES = 10
+OTP_TTL_SECONDS = OTP_EXPIRY_MINUTES * 60
 
+# Background sends run as coroutines on one event-loop thread, multiplexed over a shared HTTP/2 client
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="otp-email", daemon=True).start()
+_client = None
 
-def generate_otp() -> str:
-    """Generate a 6-digit OTP code"""
-    return ''.join(random.choices(string.digits, k=OTP_LENGTH))
-
-
-def get_otp_expiry() -> datetime:
-    """Get the expiry time for an OTP (10 minutes from now)"""
-    return datetime.utcnow() + timedelta(minutes=OTP_EXPIRY_MINUTES)
-
-
-def is_otp_expired(expiry_time: datetime) -> bool:
-    """Check if an OTP has expired"""
-    if expiry_time is None:
-        return True
-    return datetime.utcnow() > expiry_time
-
-
-def _send_email_async(to_email: str, otp_code: str, user_name: str):
-    """Send email in background thread (non-blocking)"""
-    try:
-        import requests
-        
-        name = user_name or "User"
-        
-        html_content = f"""
+# Verification email body, built once - only name, otp_code and expiry are filled per send
+OTP_HTML_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -85,7 +68,7 @@ def _send_email_async(to_email: str, otp_code: str, user_name: str):
                             </div>
                             
                             <p style="color: #64748b; font-size: 13px; margin: 25px 0 0;">
-                                This code expires in <strong style="color: #F97316;">{OTP_EXPIRY_MINUTES} minutes</strong>
+                                This code expires in <strong style="color: #F97316;">{expiry} minutes</strong>
                             </p>
                         </div>
                         
@@ -103,8 +86,39 @@ def _send_email_async(to_email: str, otp_code: str, user_name: str):
         </body>
         </html>
         """
+
+
+def generate_otp() -> str:
+    """Generate a 6-digit OTP code (cryptographically secure)"""
+    return f"{secrets.randbelow(10 ** OTP_LENGTH):0{OTP_LENGTH}d}"
+
+
+def get_otp_expiry() -> float:
+    """Get the expiry time for an OTP (10 minutes from now) as a Unix timestamp"""
+    return time.time() + OTP_TTL_SECONDS
+
+
+def is_otp_expired(expiry_time: Optional[float]) -> bool:
+    """Check if an OTP has expired"""
+    return expiry_time is None or time.time() > expiry_time
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Create the shared AsyncClient on first send (only ever called on the email loop thread)"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(http2=True, timeout=5.0)
+    return _client
+
+
+async def _send_email_async(to_email: str, otp_code: str, user_name: str):
+    """Send email on the background event loop (non-blocking)"""
+    try:
+        name = user_name or "User"
         
-        response = requests.post(
+        html_content = OTP_HTML_TEMPLATE.format(name=name, otp_code=otp_code, expiry=OTP_EXPIRY_MINUTES)
+        
+        response = await _get_client().post(
             RESEND_API_URL,
             headers={
                 "Authorization": f"Bearer {RESEND_API_KEY}",
@@ -116,8 +130,7 @@ def _send_email_async(to_email: str, otp_code: str, user_name: str):
                 "subject": f"Your CogniFloe verification code: {otp_code}",
                 "html": html_content,
                 "text": f"Your CogniFloe verification code is: {otp_code}"
-            },
-            timeout=5  # Short timeout
+            }
         )
         
         if response.status_code == 200:
@@ -153,12 +166,7 @@ def send_otp(to_email: str, otp_code: str, user_name: Optional[str] = None) -> T
     
     # Try to send email in background (non-blocking)
     if RESEND_API_KEY:
-        thread = threading.Thread(
-            target=_send_email_async,
-            args=(to_email, otp_code, name),
-            daemon=True
-        )
-        thread.start()
+        asyncio.run_coroutine_threadsafe(_send_email_async(to_email, otp_code, name), _loop)
         return True, "OTP sent (check terminal for code)"
     else:
         return True, "OTP generated (check terminal - no email API configured)"
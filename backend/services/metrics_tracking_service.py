@@ -5,10 +5,50 @@ This service tracks actual workflow/agent executions to provide real metrics
 for the 24h/7d/30d/90d dashboard views instead of simulated data.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from backend.database.supabase_client import get_supabase_client
 from datetime import datetime, timedelta
-import random
+from cachetools import TTLCache
+import numpy as np
+import orjson
+import asyncio
+import threading
+
+# Dashboard time ranges (unknown ranges fall back to 7d)
+RANGE_DELTAS = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+    "90d": timedelta(days=90)
+}
+
+# Cost breakdown slices: (label, percent, share of total, color) - shared with the simulated metrics in metrics_api
+COST_BREAKDOWN_TEMPLATE = (
+    ("AI Model Inference", 45, 0.45, "sunset"),
+    ("Data Processing", 25, 0.25, "forest"),
+    ("Storage", 15, 0.15, "coral"),
+    ("Network", 10, 0.10, "amber"),
+    ("Other", 5, 0.05, "muted"),
+)
+
+# Aggregated metrics (dict plus serialized payload) are reused for a window that grows with the dashboard range
+# (a new log for the user drops their entries immediately)
+METRICS_CACHE_TTL_SECONDS = {
+    "24h": 30,
+    "7d": 300,
+    "30d": 900,
+    "90d": 3600
+}
+
+# Agent status by success ratio: <= 0.90 moderate, <= 0.97 good, above that optimal
+AGENT_STATUS_THRESHOLDS = np.array([0.90, 0.97])
+AGENT_STATUS_LABELS = np.array(["moderate", "good", "optimal"])
+
+# Ranges at least this long are aggregated from the hourly rollup (execution_logs_hourly)
+ROLLUP_MIN_RANGE = timedelta(days=7)
+
+# Unseeded generator for simulated workflow runs
+_execution_rng = np.random.default_rng()
 
 
 class MetricsTrackingService:
@@ -16,6 +56,23 @@ class MetricsTrackingService:
     
     def __init__(self):
         self.client = get_supabase_client()
+        # One TTL cache per time range, keyed by user_id
+        self._cache = {
+            time_range: TTLCache(maxsize=4096, ttl=ttl)
+            for time_range, ttl in METRICS_CACHE_TTL_SECONDS.items()
+        }
+        self._cache_lock = threading.Lock()
+    
+    @staticmethod
+    async def _execute(query):
+        """Run a (blocking) client query in a worker thread so the event loop keeps serving requests"""
+        return await asyncio.to_thread(query.execute)
+    
+    def _invalidate_user(self, user_id: str):
+        """Drop a user's cached aggregates after new executions are logged"""
+        with self._cache_lock:
+            for cache in self._cache.values():
+                cache.pop(user_id, None)
     
     async def log_execution(
         self,
@@ -30,7 +87,7 @@ class MetricsTrackingService:
     ) -> Dict[str, Any]:
         """Log a single workflow/agent execution"""
         try:
-            result = self.client.table("execution_logs").insert({
+            result = await self._execute(self.client.table("execution_logs").insert({
                 "user_id": user_id,
                 "workflow_id": workflow_id,
                 "agent_id": agent_id,
@@ -39,13 +96,28 @@ class MetricsTrackingService:
                 "success": success,
                 "cost_usd": cost_usd,
                 "error_message": error_message
-            }).execute()
+            }))
+            self._invalidate_user(user_id)
             
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error logging execution: {e}")
             return None
     
+    async def log_executions_bulk(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Log several executions with a single multi-row insert"""
+        if not rows:
+            return []
+        try:
+            result = await self._execute(self.client.table("execution_logs").insert(rows))
+            for user_id in {row["user_id"] for row in rows}:
+                self._invalidate_user(user_id)
+            
+            return result.data if result.data else []
+        except Exception as e:
+            print(f"Error logging executions: {e}")
+            return []
+    
     async def simulate_workflow_run(
         self,
         user_id: str,
@@ -56,73 +128,87 @@ class MetricsTrackingService:
         Simulate running a workflow - logs executions for all agents.
         This is used to generate real data for the demo.
         """
-        logs = []
+        if not agents:
+            return []
         
-        for agent in agents:
-            # Simulate realistic latency (50-500ms)
-            latency = random.randint(50, 500)
-            
-            # 95% success rate
-            success = random.random() > 0.05
-            
-            # Simulate cost ($0.001 - $0.01 per execution)
-            cost = round(random.uniform(0.001, 0.01), 4)
-            
-            error_msg = None if success else "Simulated error for testing"
-            
-            log = await self.log_execution(
-                user_id=user_id,
-                workflow_id=workflow_id,
-                agent_id=agent.get("id"),
-                agent_role=agent.get("role"),
-                latency_ms=latency,
-                success=success,
-                cost_usd=cost,
-                error_message=error_msg
-            )
-            
-            if log:
-                logs.append(log)
+        # Draw every agent's latency/outcome/cost in one shot
+        latencies = _execution_rng.integers(50, 501, len(agents)).tolist()  # 50-500ms
+        successes = (_execution_rng.random(len(agents)) > 0.05).tolist()  # 95% success rate
+        costs = _execution_rng.uniform(0.001, 0.01, len(agents)).round(4).tolist()  # $0.001 - $0.01
         
-        return logs
+        rows = [
+            {
+                "user_id": user_id,
+                "workflow_id": workflow_id,
+                "agent_id": agent.get("id"),
+                "agent_role": agent.get("role"),
+                "latency_ms": latency,
+                "success": success,
+                "cost_usd": cost,
+                "error_message": None if success else "Simulated error for testing"
+            }
+            for agent, latency, success, cost in zip(agents, latencies, successes, costs)
+        ]
+        
+        # One multi-row insert instead of a round trip per agent
+        return await self.log_executions_bulk(rows)
     
     async def get_aggregated_metrics(
         self,
         user_id: str,
-        time_range: str = "7d"
-    ) -> Dict[str, Any]:
+        time_range: str = "7d",
+        as_bytes: bool = False
+    ) -> Optional[Union[Dict[str, Any], bytes]]:
         """
         Get aggregated metrics for a user over the specified time range.
-        Returns real data from execution_logs table.
+        Returns real data from execution_logs table, cached per user and range
+        for METRICS_CACHE_TTL_SECONDS[time_range].
+        With as_bytes=True the orjson-serialized payload is returned (serialized once per cache entry).
         """
+        cache = self._cache.get(time_range)
+        if cache is not None:
+            with self._cache_lock:
+                cached = cache.get(user_id)
+            if cached is not None:
+                return cached[1] if as_bytes else cached[0]
+        
+        metrics = await self._aggregate_metrics(user_id, time_range)
+        if metrics is None:
+            return None
+        
+        payload = orjson.dumps(metrics)
+        if cache is not None:
+            with self._cache_lock:
+                cache[user_id] = (metrics, payload)
+        return payload if as_bytes else metrics
+    
+    async def _aggregate_metrics(self, user_id: str, time_range: str) -> Optional[Dict[str, Any]]:
+        """Run the aggregation query and shape the dashboard payload"""
         try:
             # Calculate date cutoff based on range
-            range_mapping = {
-                "24h": timedelta(hours=24),
-                "7d": timedelta(days=7),
-                "30d": timedelta(days=30),
-                "90d": timedelta(days=90)
-            }
-            delta = range_mapping.get(time_range, timedelta(days=7))
+            delta = RANGE_DELTAS.get(time_range, RANGE_DELTAS["7d"])
             cutoff_date = (datetime.utcnow() - delta).isoformat()
             
-            # Fetch execution logs for the user within the time range
-            result = self.client.table("execution_logs")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .gte("executed_at", cutoff_date)\
-                .execute()
+            # Totals, per-agent stats and the volume histogram are aggregated in Postgres
+            # (get_user_metrics in database/add_metrics_rpc.sql) - only the summary crosses the wire.
+            # Long ranges read hourly rollups, so their hour-aligned buckets may shift by < 1h.
+            result = await self._execute(self.client.rpc("get_user_metrics", {
+                "p_user_id": user_id,
+                "p_cutoff": cutoff_date,
+                "p_bucket_seconds": delta.total_seconds() / 12,
+                "p_use_rollup": delta >= ROLLUP_MIN_RANGE
+            }))
             
-            logs = result.data if result.data else []
+            summary = result.data
             
-            if not logs:
+            if not summary or not summary.get("total"):
                 return None  # No data, will trigger fallback to empty metrics
             
             # Calculate aggregates
-            total_executions = len(logs)
-            successful_executions = sum(1 for l in logs if l.get("success", False))
-            total_latency = sum(l.get("latency_ms", 0) for l in logs)
-            total_cost = sum(float(l.get("cost_usd", 0) or 0) for l in logs)
+            total_executions = summary["total"]
+            successful_executions = summary["successful"]
+            total_latency = summary["total_latency"]
+            total_cost = float(summary["total_cost"] or 0)
             
             # Calculate rates
             success_rate = (successful_executions / total_executions * 100) if total_executions > 0 else 0
@@ -130,36 +216,33 @@ class MetricsTrackingService:
             error_rate = 100 - success_rate
             
             # Estimate throughput (executions per minute over the period)
-            period_minutes = delta.total_seconds() / 60
-            throughput = (total_executions / period_minutes) if period_minutes > 0 else 0
+            throughput = total_executions / (delta.total_seconds() / 60)
             
-            # Group by agent for agent performance
-            agent_stats = {}
-            for log in logs:
-                role = log.get("agent_role") or "Unknown Agent"
-                if role not in agent_stats:
-                    agent_stats[role] = {
-                        "total": 0,
-                        "success": 0,
-                        "latency": 0
-                    }
-                agent_stats[role]["total"] += 1
-                if log.get("success"):
-                    agent_stats[role]["success"] += 1
-                agent_stats[role]["latency"] += log.get("latency_ms", 0)
+            # Agent performance from the per-role GROUP BY, scored for all roles at once
+            agents = summary["agents"]
+            agent_totals = np.array([stats["total"] for stats in agents])
+            success_ratios = np.array([stats["success"] for stats in agents]) / agent_totals
+            avg_latencies = np.array([stats["latency"] for stats in agents]) / agent_totals
+            statuses = AGENT_STATUS_LABELS[np.digitize(success_ratios, AGENT_STATUS_THRESHOLDS, right=True)]
             
-            agent_performance = []
-            for role, stats in agent_stats.items():
-                agent_performance.append({
-                    "name": role,
-                    "success": round(stats["success"] / stats["total"] * 100, 1) if stats["total"] > 0 else 0,
-                    "latency": round(stats["latency"] / stats["total"]) if stats["total"] > 0 else 0,
+            agent_performance = [
+                {
+                    "name": stats["role"],
+                    "success": success,
+                    "latency": latency,
                     "executions": stats["total"],
-                    "status": "optimal" if stats["success"] / stats["total"] > 0.97 else "good" if stats["success"] / stats["total"] > 0.90 else "moderate"
-                })
+                    "status": status
+                }
+                for stats, success, latency, status in zip(
+                    agents,
+                    np.round(success_ratios * 100, 1).tolist(),
+                    np.round(avg_latencies).astype(int).tolist(),
+                    statuses.tolist()
+                )
+            ]
             
-            # Generate execution volume for chart (12 data points across the period)
-            execution_volume = self._calculate_execution_volume(logs, delta)
+            # Execution volume for chart (12 data points across the period)
+            execution_volume = self._normalize_execution_volume(summary["volume"])
             
             # ROI metrics (realistic estimates)
             hours_per_execution = 0.1  # 6 minutes saved per automated task
@@ -209,11 +292,8 @@ class MetricsTrackingService:
                 },
                 "agentPerformance": agent_performance,
                 "costBreakdown": [
-                    {"label": "AI Model Inference", "value": 45, "amount": round(total_cost * 0.45, 2), "color": "sunset"},
-                    {"label": "Data Processing", "value": 25, "amount": round(total_cost * 0.25, 2), "color": "forest"},
-                    {"label": "Storage", "value": 15, "amount": round(total_cost * 0.15, 2), "color": "coral"},
-                    {"label": "Network", "value": 10, "amount": round(total_cost * 0.10, 2), "color": "amber"},
-                    {"label": "Other", "value": 5, "amount": round(total_cost * 0.05, 2), "color": "muted"}
+                    {"label": label, "value": percent, "amount": round(total_cost * share, 2), "color": color}
+                    for label, percent, share, color in COST_BREAKDOWN_TEMPLATE
                 ],
                 "totalCost": round(total_cost, 2),
                 "executionVolume": execution_volume,
@@ -227,27 +307,8 @@ class MetricsTrackingService:
             print(f"Error getting aggregated metrics: {e}")
             return None
     
-    def _calculate_execution_volume(self, logs: List[Dict], delta: timedelta) -> List[int]:
-        """Calculate execution volume distributed across 12 time buckets for the chart"""
-        if not logs:
-            return [0] * 12
-        
-        # Divide the time range into 12 buckets
-        bucket_size = delta / 12
-        now = datetime.utcnow()
-        
-        volume = [0] * 12
-        
-        for log in logs:
-            try:
-                executed_at = datetime.fromisoformat(log["executed_at"].replace("Z", "+00:00").replace("+00:00", ""))
-                age = now - executed_at
-                bucket_index = min(11, int(age / bucket_size))
-                # Reverse so newer is on the right
-                volume[11 - bucket_index] += 1
-            except:
-                pass
-        
+    def _normalize_execution_volume(self, volume: List[int]) -> List[int]:
+        """Scale the 12 per-bucket execution counts to the chart's 0-100 range"""
         # Normalize to percentage scale (0-100) for chart display
         max_val = max(volume) if max(volume) > 0 else 1
         normalized = [int((v / max_val) * 80 + 20) if v > 0 else 0 for v in volume]
@@ -5,29 +5,288 @@ Now includes real AI-powered NLP analysis and recommendations
 
 import numpy as np
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from cachetools import TTLCache
+import asyncio
+import functools
+import orjson
 import os
+import re
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+from backend.core.clock import now_iso
+import httpx
 
 # Load environment variables from .env file
 # Try both backend/.env and root .env
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-# Initialize OpenAI client (only if API key is available)
+# OpenAI clients are built on first use - instances without an API key never import openai
 _api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=_api_key) if _api_key else None
+
+# Both clients keep a pooled HTTP/2 connection set, so concurrent calls reuse warm TLS connections
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+
+@functools.cache
+def _get_client():
+    from openai import OpenAI
+    return OpenAI(
+        api_key=_api_key,
+        http_client=httpx.Client(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+    )
+
+
+@functools.cache
+def _get_async_client():
+    """Async client for request handlers"""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=_api_key,
+        http_client=httpx.AsyncClient(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+    )
+
+# Model routing: recommendations are low-stakes and go to a fast model; complexity analysis keeps
+# gpt-4 only for long workflows, where the assessment is hardest
+RECOMMENDATION_MODEL = os.getenv("COGNIFLOE_RECO_MODEL", "gpt-4o-mini")
+RECOMMENDATION_MAX_TOKENS = 120  # three short recommendations
+COMPLEXITY_MODEL = os.getenv("COGNIFLOE_COMPLEXITY_MODEL", "gpt-4o-mini")
+COMPLEXITY_MODEL_LARGE = "gpt-4"
+COMPLEXITY_LARGE_MIN_STEPS = 16
+
+# Static instructions live in the system message and only per-workflow data in the user message,
+# so every request shares an identical prefix (eligible for the provider's automatic prompt caching)
+COMPLEXITY_SYSTEM_PROMPT = """You are an expert workflow analyst. Provide concise, actionable insights in JSON format.
+
+Analyze the workflow description and step count you are given and provide a complexity assessment:
+1. Complexity score (0.0 to 1.0, where 1.0 is most complex)
+2. Complexity level (Simple/Moderate/Complex/Very Complex)
+3. Key challenges (list 2-3 main challenges)
+4. Brief optimization recommendation
+
+Respond in JSON format:
+{
+  "complexity_score": 0.0,
+  "complexity_level": "...",
+  "key_challenges": ["...", "..."],
+  "recommendation": "..."
+}"""
+
+RECOMMENDATION_SYSTEM_PROMPT = """You are a workflow optimization expert. Provide specific, actionable advice.
+
+Given a workflow analysis, provide 3 specific, actionable recommendations to improve the workflow. Be concise.
+
+Format as JSON array: ["recommendation 1", "recommendation 2", "recommendation 3"]"""
+
+# Column order of the trained models' feature vectors
+MODEL_FEATURE_NAMES = ["word_count", "complexity_keywords", "agent_count", "step_count",
+                       "historical_avg_time", "confidence_score", "workflow_age_days", "agent_performance"]
+
+# Complexity keywords, matched as case-insensitive substrings; a feature counts each distinct keyword once
+_FEATURE_KEYWORD_RE = re.compile(
+    r'complex|multiple|integration|advanced|critical|extract|validate|monitor|real-time|security',
+    re.IGNORECASE
+)
+# Subset that drives the heuristic complexity score
+_COMPLEXITY_KEYWORDS = frozenset(['complex', 'multiple', 'integration', 'advanced', 'critical'])
+
+FALLBACK_RECOMMENDATIONS = [
+    "Add checkpoints for incremental validation",
+    "Consider parallel agent execution",
+    "Implement automated error recovery"
+]
+
+# GPT results keyed by the exact user message: repeated workflows (dashboard refreshes, retries) cost one call per TTL
+GPT_CACHE_TTL_SECONDS = 3600
+_gpt_cache = TTLCache(maxsize=4096, ttl=GPT_CACHE_TTL_SECONDS)
+_gpt_cache_lock = threading.Lock()
+
+# Near-duplicate descriptions (same step count, cosine similarity above the threshold) reuse a complexity analysis
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_SIZE = 1024
+
+
+class _SemanticCache:
+    """Complexity analyses indexed by unit-normalized description embeddings (oldest entry evicted first)"""
+    
+    def __init__(self, size: int = SEMANTIC_CACHE_SIZE):
+        self._vectors = np.zeros((size, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        self._step_counts = np.full(size, -1)
+        self._results: List[Optional[Dict[str, Any]]] = [None] * size
+        self._next = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+    
+    def lookup(self, step_count: int, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            # One matrix-vector product scores every cached description
+            similarities = self._vectors @ vector
+            similarities[self._step_counts != step_count] = -1.0
+            best = int(np.argmax(similarities))
+            return self._results[best] if similarities[best] >= SEMANTIC_CACHE_THRESHOLD else None
+    
+    def add(self, step_count: int, vector: np.ndarray, result: Dict[str, Any]):
+        with self._lock:
+            slot = self._next % len(self._results)
+            self._vectors[slot] = vector
+            self._step_counts[slot] = step_count
+            self._results[slot] = result
+            self._next += 1
+
+
+_semantic_cache = _SemanticCache()
+
+
+# After this many consecutive failed API calls, GPT features are skipped (heuristics only) for the cooldown
+GPT_BREAKER_FAILURES = 3
+GPT_BREAKER_COOLDOWN_SECONDS = 60
+# Concurrent async API calls per process
+GPT_MAX_CONCURRENT = int(os.getenv("OPENAI_MAX_CONCURRENT", "10"))
+
+
+class _CircuitBreaker:
+    """Consecutive-failure breaker: while open, callers go straight to their fallback instead of waiting on timeouts"""
+    
+    def __init__(self, max_failures: int = GPT_BREAKER_FAILURES, cooldown: float = GPT_BREAKER_COOLDOWN_SECONDS):
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            # Once the cooldown has passed, calls go through again (one more failure re-opens it)
+            return self._failures < self.max_failures or time.monotonic() - self._opened_at >= self.cooldown
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.max_failures:
+                self._opened_at = time.monotonic()
+
+
+_gpt_breaker = _CircuitBreaker()
+# The semantic tier is an optional cache: embedding outages only disable near-duplicate lookups, never chat calls
+_embedding_breaker = _CircuitBreaker()
+_gpt_semaphore = asyncio.Semaphore(GPT_MAX_CONCURRENT)
+
+
+def _cached_gpt_result(key: tuple):
+    with _gpt_cache_lock:
+        return _gpt_cache.get(key)
+
+
+def _store_gpt_result(key: tuple, result):
+    with _gpt_cache_lock:
+        _gpt_cache[key] = result
+
+
+def _parse_json_reply(content: str):
+    """Decode a model reply, tolerating a ```json fenced block around the payload"""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").removeprefix("json").strip()
+    return orjson.loads(content)
+
+
+def _check_complexity_reply(result) -> Dict[str, Any]:
+    """Reject complexity replies missing the fields the predictors index, so they are never cached"""
+    if not (
+        isinstance(result, dict)
+        and isinstance(result.get('complexity_score'), (int, float))
+        and not isinstance(result['complexity_score'], bool)
+        and isinstance(result.get('complexity_level'), str)
+        and isinstance(result.get('key_challenges'), list)
+        and isinstance(result.get('recommendation'), str)
+    ):
+        raise ValueError(f"malformed complexity reply: {result!r}")
+    return result
+
+
+def _check_recommendations_reply(result) -> List[str]:
+    """Reject recommendation replies that are not a list of strings, so they are never cached"""
+    if not (isinstance(result, list) and all(isinstance(item, str) for item in result)):
+        raise ValueError(f"malformed recommendations reply: {result!r}")
+    return result
+
+
+@functools.lru_cache(maxsize=4096)
+def _description_stats(description: str) -> tuple:
+    """
+    (word_count, keyword_count, complexity_keyword_count) from one split and one regex pass.
+    Shared by both feature vectors and the heuristic complexity score, so a request scans its description once.
+    """
+    keywords = {match.lower() for match in _FEATURE_KEYWORD_RE.findall(description)}
+    return len(description.split()), len(keywords), len(keywords & _COMPLEXITY_KEYWORDS)
 
 
 class AdvancedNLPAnalyzer:
     """GPT-4 powered NLP analysis for workflows"""
     
+    @staticmethod
+    def _complexity_messages(description: str, step_count: int) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": COMPLEXITY_SYSTEM_PROMPT},
+            {"role": "user", "content": f'Workflow: "{description}"\nNumber of steps: {step_count}'}
+        ]
+    
+    @staticmethod
+    def _complexity_model(step_count: int) -> str:
+        return COMPLEXITY_MODEL_LARGE if step_count >= COMPLEXITY_LARGE_MIN_STEPS else COMPLEXITY_MODEL
+    
+    @staticmethod
+    def _complexity_request(step_count: int) -> Dict[str, Any]:
+        """Model (plus JSON mode where supported - gpt-4 rejects it) for a complexity call"""
+        model = AdvancedNLPAnalyzer._complexity_model(step_count)
+        if model == COMPLEXITY_MODEL_LARGE:
+            return {"model": model}
+        return {"model": model, "response_format": {"type": "json_object"}}
+    
+    @staticmethod
+    def _fallback_complexity(description: str, step_count: int) -> Dict[str, Any]:
+        """Heuristic used when the API call fails"""
+        return {
+            'complexity_score': min(len(description.split()) / 100 + step_count / 20, 1.0),
+            'complexity_level': 'Moderate',
+            'key_challenges': ['Data validation', 'Process coordination'],
+            'recommendation': 'Consider breaking into smaller sub-workflows'
+        }
+    
+    @staticmethod
+    async def _embed_async(description: str) -> Optional[np.ndarray]:
+        """Description embedding for the semantic cache (None - a cache miss - when unavailable)"""
+        if not _embedding_breaker.allow():
+            return None
+        try:
+            async with _gpt_semaphore:
+                response = await _get_async_client().embeddings.create(model=EMBEDDING_MODEL, input=description)
+        except Exception as e:
+            _embedding_breaker.record_failure()
+            print(f"Embedding failed: {e}")
+            return None
+        _embedding_breaker.record_success()
+        return _SemanticCache.normalize(response.data[0].embedding)
+    
     @staticmethod
     def analyze_complexity_with_gpt(description: str, step_count: int) -> Dict[str, Any]:
         """
         Use GPT-4 to analyze workflow complexity with deep understanding
+        (repeated descriptions are answered from cache; the near-duplicate lookup needs an extra
+        embedding round trip, so only the async variant uses it)
         
         Returns:
             {
@@ -37,85 +296,118 @@ class AdvancedNLPAnalyzer:
                 'recommendation': str
             }
         """
+        messages = AdvancedNLPAnalyzer._complexity_messages(description, step_count)
+        key = ("complexity", messages[-1]["content"])
+        cached = _cached_gpt_result(key)
+        if cached is not None:
+            return cached
+        
+        if not _gpt_breaker.allow():
+            return AdvancedNLPAnalyzer._fallback_complexity(description, step_count)
+        
         try:
-            prompt = f"""Analyze this workflow description and provide complexity assessment:
-
-Workflow: "{description}"
-Number of steps: {step_count}
-
-Please provide:
-1. Complexity score (0.0 to 1.0, where 1.0 is most complex)
-2. Complexity level (Simple/Moderate/Complex/Very Complex)
-3. Key challenges (list 2-3 main challenges)
-4. Brief optimization recommendation
-
-Respond in JSON format:
-{{
-  "complexity_score": 0.0,
-  "complexity_level": "...",
-  "key_challenges": ["...", "..."],
-  "recommendation": "..."
-}}"""
-            
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert workflow analyst. Provide concise, actionable insights in JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = _get_client().chat.completions.create(
+                **AdvancedNLPAnalyzer._complexity_request(step_count),
+                messages=messages,
                 temperature=0.3,
                 max_tokens=300
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
-            return result
+            result = _check_complexity_reply(_parse_json_reply(response.choices[0].message.content))
             
         except Exception as e:
             # Fallback to heuristic if API fails
+            _gpt_breaker.record_failure()
             print(f"GPT-4 analysis failed: {e}")
-            return {
-                'complexity_score': min(len(description.split()) / 100 + step_count / 20, 1.0),
-                'complexity_level': 'Moderate',
-                'key_challenges': ['Data validation', 'Process coordination'],
-                'recommendation': 'Consider breaking into smaller sub-workflows'
-            }
+            return AdvancedNLPAnalyzer._fallback_complexity(description, step_count)
+        
+        _gpt_breaker.record_success()
+        _store_gpt_result(key, result)
+        return result
     
     @staticmethod
-    def generate_smart_recommendations(workflow_data: Dict[str, Any]) -> List[str]:
-        """Generate AI-powered optimization recommendations"""
+    async def analyze_complexity_with_gpt_async(description: str, step_count: int) -> Dict[str, Any]:
+        """Non-blocking analyze_complexity_with_gpt for request handlers (also answers near-duplicates from cache)"""
+        messages = AdvancedNLPAnalyzer._complexity_messages(description, step_count)
+        key = ("complexity", messages[-1]["content"])
+        cached = _cached_gpt_result(key)
+        if cached is not None:
+            return cached
+        
+        vector = await AdvancedNLPAnalyzer._embed_async(description)
+        if vector is not None:
+            similar = _semantic_cache.lookup(step_count, vector)
+            if similar is not None:
+                _store_gpt_result(key, similar)
+                return similar
+        
+        if not _gpt_breaker.allow():
+            return AdvancedNLPAnalyzer._fallback_complexity(description, step_count)
+        
         try:
-            prompt = f"""Given this workflow analysis:
+            async with _gpt_semaphore:
+                response = await _get_async_client().chat.completions.create(
+                    **AdvancedNLPAnalyzer._complexity_request(step_count),
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=300
+                )
+            
+            result = _check_complexity_reply(_parse_json_reply(response.choices[0].message.content))
+            
+        except Exception as e:
+            _gpt_breaker.record_failure()
+            print(f"GPT-4 analysis failed: {e}")
+            return AdvancedNLPAnalyzer._fallback_complexity(description, step_count)
+        
+        _gpt_breaker.record_success()
+        _store_gpt_result(key, result)
+        if vector is not None:
+            _semantic_cache.add(step_count, vector, result)
+        return result
+    
+    @staticmethod
+    def _recommendation_messages(workflow_data: Dict[str, Any]) -> List[Dict[str, str]]:
+        prompt = f"""Workflow analysis:
 - Success Probability: {workflow_data.get('success_prob', 0.85):.1%}
 - Completion Time: {workflow_data.get('predicted_hours', 3)} hours
 - Agent Count: {workflow_data.get('agent_count', 2)}
-- Risk Level: {workflow_data.get('risk_level', 'Medium')}
-
-Provide 3 specific, actionable recommendations to improve this workflow. Be concise.
-
-Format as JSON array: ["recommendation 1", "recommendation 2", "recommendation 3"]"""
-
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a workflow optimization expert. Provide specific, actionable advice."},
-                    {"role": "user", "content": prompt}
-                ],
+- Risk Level: {workflow_data.get('risk_level', 'Medium')}"""
+        return [
+            {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    @staticmethod
+    def generate_smart_recommendations(workflow_data: Dict[str, Any]) -> List[str]:
+        """Generate AI-powered optimization recommendations"""
+        messages = AdvancedNLPAnalyzer._recommendation_messages(workflow_data)
+        key = ("recommendations", messages[-1]["content"])
+        cached = _cached_gpt_result(key)
+        if cached is not None:
+            return cached
+        
+        if not _gpt_breaker.allow():
+            return list(FALLBACK_RECOMMENDATIONS)
+        
+        try:
+            response = _get_client().chat.completions.create(
+                model=RECOMMENDATION_MODEL,
+                messages=messages,
                 temperature=0.4,
-                max_tokens=200
+                max_tokens=RECOMMENDATION_MAX_TOKENS
             )
             
-            import json
-            recommendations = json.loads(response.choices[0].message.content)
-            return recommendations
+            result = _check_recommendations_reply(_parse_json_reply(response.choices[0].message.content))
             
         except Exception as e:
+            _gpt_breaker.record_failure()
             print(f"GPT-4 recommendations failed: {e}")
-            return [
-                "Add checkpoints for incremental validation",
-                "Consider parallel agent execution",
-                "Implement automated error recovery"
-            ]
+            return list(FALLBACK_RECOMMENDATIONS)
+        
+        _gpt_breaker.record_success()
+        _store_gpt_result(key, result)
+        return result
 
 
 class PredictiveModel:
@@ -126,7 +418,9 @@ class PredictiveModel:
         self.rf_time = None
         self.gb_time = None
         self.success_clf = None
+        self.rf_time_importances = {}
         self.models_loaded = False
+        self._onnx_sessions = {}
         self._load_models()
         
         # Fallback weights (used only if models fail to load)
@@ -142,6 +436,9 @@ class PredictiveModel:
             'agent_performance': 0.25,
             'complexity_score': 0.15
         }
+        # Weights unpacked once for the fallback formulas (fixed after construction, in dict order)
+        self._time_weights = tuple(self.time_model_weights.values())
+        self._success_weights = tuple(self.success_model_weights.values())
     
     def _load_models(self):
         """Load trained ML models from disk"""
@@ -153,35 +450,81 @@ class PredictiveModel:
                 self.rf_time = joblib.load(model_dir / "rf_time_model.joblib")
                 self.gb_time = joblib.load(model_dir / "gb_time_model.joblib")
                 self.success_clf = joblib.load(model_dir / "success_classifier.joblib")
+                # feature_importances_ re-averages every tree on each access - read it once
+                self.rf_time_importances = dict(zip(MODEL_FEATURE_NAMES, self.rf_time.feature_importances_.tolist()))
                 self.models_loaded = True
                 print(f"✅ Real ML models loaded from {model_dir}")
+                self._load_onnx_sessions(model_dir)
             else:
                 print(f"⚠️ No trained models found at {model_dir}, using heuristic fallback")
         except Exception as e:
             print(f"⚠️ Failed to load ML models: {e}, using heuristic fallback")
     
+    def _load_onnx_sessions(self, model_dir: Path):
+        """
+        Compile the loaded ensembles to ONNX Runtime sessions (optional - needs skl2onnx + onnxruntime).
+        Exports are cached next to the joblib files and rebuilt when those are newer.
+        Each model falls back to scikit-learn on its own if it cannot be exported.
+        """
+        if os.getenv("ML_USE_ONNX", "1") != "1":
+            return
+        try:
+            import onnxruntime as ort
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+        except ImportError:
+            return
+        
+        for name, model, source in (
+            ("rf_time", self.rf_time, "rf_time_model.joblib"),
+            ("gb_time", self.gb_time, "gb_time_model.joblib"),
+            ("success_clf", self.success_clf, "success_classifier.joblib")
+        ):
+            try:
+                onnx_path = model_dir / f"{name}.onnx"
+                if onnx_path.exists() and onnx_path.stat().st_mtime >= (model_dir / source).stat().st_mtime:
+                    onnx_model = onnx_path.read_bytes()
+                else:
+                    # zipmap=False: classifier probabilities come back as a plain (n, n_classes) array
+                    options = {id(model): {"zipmap": False}} if name == "success_clf" else None
+                    onnx_model = convert_sklearn(
+                        model,
+                        initial_types=[("X", FloatTensorType([None, model.n_features_in_]))],
+                        options=options
+                    ).SerializeToString()
+                    try:
+                        onnx_path.write_bytes(onnx_model)
+                    except OSError:
+                        pass  # read-only deploy - keep the in-memory export
+                self._onnx_sessions[name] = ort.InferenceSession(onnx_model, providers=["CPUExecutionProvider"])
+            except Exception as e:
+                print(f"⚠️ ONNX export failed for {name}: {str(e).splitlines()[0]}, using scikit-learn")
+        
+        if self._onnx_sessions:
+            print(f"✅ ONNX Runtime inference enabled for: {', '.join(self._onnx_sessions)}")
+    
+    def _onnx_predict(self, name: str, features: np.ndarray, output: int = 0) -> np.ndarray:
+        X = np.asarray(features, dtype=np.float32)
+        return self._onnx_sessions[name].run(None, {"X": X})[output].astype(np.float64)
+    
     def _extract_features(self, description: str, agent_count: int, step_count: int,
                           historical_avg_time: float, confidence_score: float = 0.8,
                           workflow_age_days: int = 30, agent_performance: float = 0.85) -> list:
         """Extract feature vector for ML model input"""
-        word_count = len(description.split())
-        
-        complexity_keywords = ['complex', 'multiple', 'integration', 'advanced', 'critical',
-                               'extract', 'validate', 'monitor', 'real-time', 'security']
-        keyword_count = sum(1 for word in complexity_keywords if word in description.lower())
+        word_count, keyword_count, _ = _description_stats(description)
         
         return [word_count, keyword_count, agent_count, step_count,
                 historical_avg_time, confidence_score, workflow_age_days, agent_performance]
     
-    def _calculate_complexity(self, description: str, step_count: int, use_gpt: bool = True) -> tuple:
-        """Calculate workflow complexity with optional GPT-4 enhancement"""
-        if use_gpt and os.getenv("OPENAI_API_KEY"):
+    def _calculate_complexity(self, description: str, step_count: int, use_gpt: bool = True,
+                              gpt_analysis: Optional[Dict[str, Any]] = None) -> tuple:
+        """Calculate workflow complexity with optional GPT-4 enhancement (or an analysis fetched by the caller)"""
+        if gpt_analysis is None and use_gpt and os.getenv("OPENAI_API_KEY"):
             gpt_analysis = self.nlp_analyzer.analyze_complexity_with_gpt(description, step_count)
+        if gpt_analysis is not None:
             return gpt_analysis['complexity_score'], gpt_analysis
         else:
-            word_count = len(description.split())
-            complexity_keywords = ['complex', 'multiple', 'integration', 'advanced', 'critical']
-            keyword_count = sum(1 for word in complexity_keywords if word in description.lower())
+            word_count, _, keyword_count = _description_stats(description)
             
             base_complexity = min(word_count / 50, 1.0)
             keyword_bonus = keyword_count * 0.1
@@ -190,8 +533,57 @@ class PredictiveModel:
             score = min(base_complexity + keyword_bonus + step_penalty, 1.0)
             return score, None
     
-    def predict_completion_time(self, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Predict workflow completion time using REAL trained ML models"""
+    def time_features(self, workflow_data: Dict[str, Any]) -> list:
+        """Feature vector used by the completion-time ensemble"""
+        return self._extract_features(
+            workflow_data.get('description', ''),
+            workflow_data.get('agent_count', 1),
+            workflow_data.get('step_count', 5),
+            workflow_data.get('historical_avg_time', 2.0)
+        )
+    
+    def success_features(self, workflow_data: Dict[str, Any]) -> list:
+        """Feature vector used by the success classifier"""
+        confidence_scores = workflow_data.get('confidence_scores', [0.8])
+        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.8
+        return self._extract_features(
+            workflow_data.get('description', ''),
+            workflow_data.get('agent_count', 2),
+            workflow_data.get('step_count', 5),
+            workflow_data.get('historical_avg_time', 2.0),
+            avg_confidence,
+            workflow_data.get('workflow_age_days', 30),
+            workflow_data.get('agent_performance_avg', 0.85)
+        )
+    
+    def predict_time_batch(self, features: np.ndarray) -> np.ndarray:
+        """Ensemble completion-time predictions (60% RF + 40% GB) for a feature matrix"""
+        if "rf_time" in self._onnx_sessions:
+            rf_pred = self._onnx_predict("rf_time", features).ravel()
+        else:
+            rf_pred = self.rf_time.predict(features)
+        if "gb_time" in self._onnx_sessions:
+            gb_pred = self._onnx_predict("gb_time", features).ravel()
+        else:
+            gb_pred = self.gb_time.predict(features)
+        return 0.6 * rf_pred + 0.4 * gb_pred
+    
+    def predict_success_batch(self, features: np.ndarray) -> np.ndarray:
+        """Success probabilities for a feature matrix"""
+        if "success_clf" in self._onnx_sessions:
+            proba = self._onnx_predict("success_clf", features, output=1)
+        else:
+            proba = self.success_clf.predict_proba(features)
+        return proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+    
+    def predict_completion_time(self, workflow_data: Dict[str, Any],
+                                predicted_hours: Optional[float] = None,
+                                gpt_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Predict workflow completion time using REAL trained ML models.
+        `predicted_hours` lets a caller that already ran the ensemble (e.g. a batch) skip inference;
+        `gpt_analysis` supplies an already fetched GPT complexity analysis for the heuristic fallback.
+        """
         description = workflow_data.get('description', '')
         agent_count = workflow_data.get('agent_count', 1)
         step_count = workflow_data.get('step_count', 5)
@@ -199,21 +591,14 @@ class PredictiveModel:
         
         if self.models_loaded:
             # USE REAL ML MODELS
-            features = self._extract_features(
-                description, agent_count, step_count, historical_avg
-            )
-            feature_array = np.array([features])
-            
-            # Ensemble prediction: 60% RandomForest + 40% GradientBoosting
-            rf_pred = self.rf_time.predict(feature_array)[0]
-            gb_pred = self.gb_time.predict(feature_array)[0]
-            predicted_hours = 0.6 * rf_pred + 0.4 * gb_pred
+            if predicted_hours is None:
+                # float32 like PredictionBatcher - sklearn's trees use it, so no conversion copy per call
+                feature_array = np.array([self.time_features(workflow_data)], dtype=np.float32)
+                predicted_hours = float(self.predict_time_batch(feature_array)[0])
             predicted_hours = max(0.5, predicted_hours)
             
             # Feature importances from the model
-            feature_names = ["word_count", "complexity_keywords", "agent_count", "step_count",
-                           "historical_avg_time", "confidence_score", "workflow_age_days", "agent_performance"]
-            importances = dict(zip(feature_names, self.rf_time.feature_importances_))
+            importances = self.rf_time_importances
             
             uncertainty = 0.12 * predicted_hours
             confidence = 0.82 + min(historical_avg, 10) / 50
@@ -234,14 +619,13 @@ class PredictiveModel:
             }
         else:
             # FALLBACK: Heuristic model
-            complexity, gpt_insights = self._calculate_complexity(description, step_count, use_gpt=True)
-            features = {
-                'complexity': complexity * 10,
-                'agent_count': agent_count * 0.5,
-                'historical_avg': historical_avg,
-                'step_count': step_count * 0.3
-            }
-            predicted_hours = sum(features[key] * self.time_model_weights[key] for key in self.time_model_weights)
+            complexity, gpt_insights = self._calculate_complexity(description, step_count, use_gpt=True,
+                                                                  gpt_analysis=gpt_analysis)
+            complexity_term = complexity * 10
+            agent_term = agent_count * 0.5
+            w_complexity, w_agents, w_historical, w_steps = self._time_weights
+            predicted_hours = (w_complexity * complexity_term + w_agents * agent_term +
+                               w_historical * historical_avg + w_steps * (step_count * 0.3))
             uncertainty = 0.15 * predicted_hours
             confidence = 0.75 + (min(historical_avg, 10) / 40)
             
@@ -253,9 +637,9 @@ class PredictiveModel:
                     'max': round(predicted_hours + uncertainty, 2)
                 },
                 'factors': {
-                    'complexity_impact': round(features['complexity'], 2),
-                    'agent_impact': round(-features['agent_count'] * 0.3, 2),
-                    'historical_baseline': round(features['historical_avg'], 2)
+                    'complexity_impact': round(complexity_term, 2),
+                    'agent_impact': round(-agent_term * 0.3, 2),
+                    'historical_baseline': round(historical_avg, 2)
                 },
                 'model_type': 'Heuristic (fallback)'
             }
@@ -269,43 +653,81 @@ class PredictiveModel:
         
         return result
     
-    def predict_success_probability(self, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Predict workflow success probability using REAL trained classifier"""
+    def predict_success_probability(self, workflow_data: Dict[str, Any],
+                                    success_prob: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Predict workflow success probability using REAL trained classifier.
+        `success_prob` lets a caller that already ran the classifier (e.g. a batch) skip inference.
+        """
+        result = self._predict_success(workflow_data, success_prob)
+        
+        # Add GPT-4 recommendations if API key available
+        if os.getenv("OPENAI_API_KEY"):
+            try:
+                result['ai_recommendations'] = self.nlp_analyzer.generate_smart_recommendations(
+                    self._recommendation_input(workflow_data, result)
+                )
+            except Exception as e:
+                print(f"Failed to generate AI recommendations: {e}")
+        
+        return result
+    
+    async def predict_async(self, time_data: Dict[str, Any], success_data: Dict[str, Any],
+                            predicted_hours: Optional[float] = None,
+                            success_prob: Optional[float] = None) -> tuple:
+        """
+        Completion-time and success predictions for a request handler.
+        Only the GPT complexity analysis reaches the /predict response (and only without trained models),
+        so no recommendations are requested here.
+        """
+        success_result = self._predict_success(success_data, success_prob)
+        gpt_analysis = None
+        
+        if _api_key and not self.models_loaded:
+            gpt_analysis = await self.nlp_analyzer.analyze_complexity_with_gpt_async(
+                time_data.get('description', ''), time_data.get('step_count', 5)
+            )
+        
+        time_result = self.predict_completion_time(time_data, predicted_hours, gpt_analysis=gpt_analysis)
+        return time_result, success_result
+    
+    @staticmethod
+    def _recommendation_input(workflow_data: Dict[str, Any], success_result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'success_prob': success_result['success_probability'],
+            'predicted_hours': workflow_data.get('predicted_hours', 3),
+            'agent_count': workflow_data.get('agent_count', 2),
+            'risk_level': success_result['risk_level']
+        }
+    
+    def _predict_success(self, workflow_data: Dict[str, Any],
+                         success_prob: Optional[float] = None) -> Dict[str, Any]:
+        """Success probability, risk level and risk factors (model or heuristic, no API calls)"""
         confidence_scores = workflow_data.get('confidence_scores', [0.8])
         workflow_age = workflow_data.get('workflow_age_days', 30)
         agent_perf = workflow_data.get('agent_performance_avg', 0.85)
         description = workflow_data.get('description', '')
         step_count = workflow_data.get('step_count', 5)
         agent_count = workflow_data.get('agent_count', 2)
-        historical_avg = workflow_data.get('historical_avg_time', 2.0)
         
-        avg_confidence = float(np.mean(confidence_scores)) if confidence_scores else 0.8
+        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.8
+        # Heuristic complexity, shared by the fallback score and the risk factors
+        complexity_score, _ = self._calculate_complexity(description, step_count, use_gpt=False)
         
         if self.models_loaded:
             # USE REAL ML CLASSIFIER
-            features = self._extract_features(
-                description, agent_count, step_count, historical_avg,
-                avg_confidence, workflow_age, agent_perf
-            )
-            feature_array = np.array([features])
-            
-            # Get probability from classifier
-            proba = self.success_clf.predict_proba(feature_array)[0]
-            success_prob = float(proba[1]) if len(proba) > 1 else float(proba[0])
+            if success_prob is None:
+                feature_array = np.array([self.success_features(workflow_data)], dtype=np.float32)
+                success_prob = float(self.predict_success_batch(feature_array)[0])
             success_prob = max(0.1, min(success_prob, 0.99))
             
             model_type = 'RandomForest Classifier (scikit-learn)'
         else:
             # FALLBACK: Weighted heuristic
-            complexity, _ = self._calculate_complexity(description, step_count, use_gpt=False)
             age_factor = min(workflow_age / 90, 1.0)
-            features_dict = {
-                'confidence_score': avg_confidence,
-                'workflow_age': age_factor,
-                'agent_performance': agent_perf,
-                'complexity_score': 1 - complexity
-            }
-            success_prob = sum(features_dict[key] * self.success_model_weights[key] for key in self.success_model_weights)
+            w_confidence, w_age, w_performance, w_simplicity = self._success_weights
+            success_prob = (w_confidence * avg_confidence + w_age * age_factor +
+                            w_performance * agent_perf + w_simplicity * (1 - complexity_score))
             success_prob = max(0.1, min(success_prob, 0.99))
             model_type = 'Heuristic (fallback)'
         
@@ -325,8 +747,6 @@ class PredictiveModel:
                 'impact': 'High',
                 'value': round(avg_confidence, 2)
             })
-        
-        complexity_score, _ = self._calculate_complexity(description, step_count, use_gpt=False)
         if complexity_score > 0.7:
             risk_factors.append({
                 'factor': 'High Complexity',
@@ -353,19 +773,6 @@ class PredictiveModel:
             'model_type': model_type
         }
         
-        # Add GPT-4 recommendations if API key available
-        if os.getenv("OPENAI_API_KEY"):
-            try:
-                recommendations = self.nlp_analyzer.generate_smart_recommendations({
-                    'success_prob': success_prob,
-                    'predicted_hours': workflow_data.get('predicted_hours', 3),
-                    'agent_count': agent_count,
-                    'risk_level': risk_level
-                })
-                result['ai_recommendations'] = recommendations
-            except Exception as e:
-                print(f"Failed to generate AI recommendations: {e}")
-        
         return result
 
 
@@ -439,7 +846,8 @@ class AnomalyDetector:
             })
             anomaly_scores.append(min(error_count / 15, 1.0))
         
-        overall_score = np.mean(anomaly_scores) if anomaly_scores else 0.0
+        # At most four scores - plain float math beats converting the list to an array for np.mean
+        overall_score = sum(anomaly_scores) / len(anomaly_scores) if anomaly_scores else 0.0
         
         if overall_score > 0.7:
             severity = 'Critical'
@@ -455,7 +863,7 @@ class AnomalyDetector:
             'anomaly_score': round(overall_score, 3),
             'anomalies_detected': anomalies,
             'severity': severity,
-            'timestamp': workflow_metrics.get('timestamp', datetime.now().isoformat()),
+            'timestamp': workflow_metrics['timestamp'] if 'timestamp' in workflow_metrics else now_iso(),
             'recommendation': self._get_recommendation(anomalies) if anomalies else None
         }
     
@@ -0,0 +1,70 @@
+"""
+Micro-batching for sklearn inference
+
+Concurrent /ml/predict requests are coalesced into one feature matrix so the
+tree ensembles run once per batch instead of once per request.
+"""
+
+import asyncio
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.ml_service import PredictiveModel
+
+
+class PredictionBatcher:
+    """Queue-backed batcher - requests await a future resolved with their slice of the batch result"""
+
+    def __init__(self, model: PredictiveModel, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def predict(self, time_features: list, success_features: list) -> Tuple[float, float]:
+        """Return (ensemble predicted hours, success probability) for one workflow"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((time_features, success_features, future))
+        return await future
+
+    def _ensure_worker(self):
+        # Started lazily so the batcher always lives on the loop that is serving requests
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self.max_wait:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                # Tree traversal is CPU-bound and releases the GIL - run it off the event loop
+                hours, probabilities = await asyncio.to_thread(self._predict, batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (*_, future), predicted_hours, success_prob in zip(batch, hours, probabilities):
+                if not future.done():
+                    future.set_result((predicted_hours, success_prob))
+
+    def _predict(self, batch: List[tuple]) -> Tuple[List[float], List[float]]:
+        # float32 is what sklearn trees use internally - avoids a conversion copy per model
+        time_matrix = np.asarray([item[0] for item in batch], dtype=np.float32)
+        success_matrix = np.asarray([item[1] for item in batch], dtype=np.float32)
+        return (
+            self.model.predict_time_batch(time_matrix).tolist(),
+            self.model.predict_success_batch(success_matrix).tolist()
+        )
@@ -3,13 +3,50 @@ AI-Powered Workflow Analysis Engine
 Analyzes workflows for complexity, bottlenecks, optimization opportunities, and risks
 """
 
+import functools
 import re
+from collections import Counter
 from typing import Dict, List, Any
-from datetime import datetime
+from backend.core.clock import now_iso
+
+# Optional Aho-Corasick matcher (pip install pyahocorasick) - finds every keyword in one pass
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Static suggestions, shared by every analysis (serialized as-is - never mutated)
+PARALLELIZE_SUGGESTION = {
+    'title': 'Parallelize Independent Tasks',
+    'description': "Some workflow steps may be able to run in parallel",
+    'impact': 'Medium',
+    'effort': 'Low',
+    'time_savings': "20-30% faster execution"
+}
+DATA_CACHING_SUGGESTION = {
+    'title': 'Implement Data Caching',
+    'description': "Cache frequently accessed data to reduce processing time",
+    'impact': 'Medium',
+    'effort': 'Low',
+    'time_savings': "15% reduction in data retrieval time"
+}
+ERROR_HANDLING_SUGGESTION = {
+    'title': 'Add Robust Error Handling',
+    'description': "Implement retry logic and fallback mechanisms",
+    'impact': 'High',
+    'effort': 'Medium',
+    'time_savings': "Prevent workflow failures and reduce manual intervention"
+}
 
 class WorkflowAnalyzer:
     """Advanced workflow analysis engine"""
     
+    # Fixed attribute set (no per-instance __dict__) - subclasses adding attributes must declare their own slots
+    __slots__ = (
+        'complexity_keywords', 'bottleneck_indicators', 'risk_keywords',
+        'scan_keywords', '_automaton', '_analyze_cached'
+    )
+    
     def __init__(self):
         # Keywords that indicate complexity
         self.complexity_keywords = {
@@ -27,6 +64,22 @@ class WorkflowAnalyzer:
         self.risk_keywords = [
             'critical', 'sensitive', 'security', 'compliance', 'regulation', 'legal', 'financial'
         ]
+        
+        # Everything the checks below look for, so a description is scanned once per analysis
+        self.scan_keywords = list(dict.fromkeys(
+            [kw for keywords in self.complexity_keywords.values() for kw in keywords] +
+            self.bottleneck_indicators + self.risk_keywords +
+            ['then', 'after', 'data', 'information', 'database', 'integrate', 'api']
+        ))
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.scan_keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        
+        # Analyses are deterministic in (description, step count) - repeated requests reuse the result
+        self._analyze_cached = functools.lru_cache(maxsize=512)(self._analyze)
     
     def analyze_workflow(self, workflow_description: str, workflow_steps: List[str] = None) -> Dict[str, Any]:
         """
@@ -39,15 +92,22 @@ class WorkflowAnalyzer:
         Returns:
             Complete analysis results dictionary
         """
-        description_lower = workflow_description.lower()
-        steps = workflow_steps or []
+        # Only the number of steps feeds the analysis, so it (not the step texts) is part of the cache key.
+        # The cached sections are shared between calls - callers must not mutate them.
+        result = dict(self._analyze_cached(workflow_description.lower(), len(workflow_steps or [])))
+        result['analyzed_at'] = now_iso()
+        return result
+    
+    def _analyze(self, description_lower: str, step_count: int) -> Dict[str, Any]:
+        """All analysis sections except the timestamp"""
+        hits = self._scan_keywords(description_lower)
         
         # Run all analysis components
-        complexity = self._analyze_complexity(description_lower, steps)
-        bottlenecks = self._detect_bottlenecks(description_lower, steps)
-        optimizations = self._suggest_optimizations(description_lower, steps, bottlenecks)
-        cost_benefit = self._estimate_cost_benefit(complexity, len(steps))
-        risks = self._analyze_risks(description_lower, steps)
+        complexity = self._analyze_complexity(hits, step_count)
+        bottlenecks = self._detect_bottlenecks(hits)
+        optimizations = self._suggest_optimizations(hits, step_count, bottlenecks)
+        cost_benefit = self._estimate_cost_benefit(complexity, step_count)
+        risks = self._analyze_risks(hits)
         
         return {
             'complexity': complexity,
@@ -55,20 +115,25 @@ class WorkflowAnalyzer:
             'optimizations': optimizations,
             'cost_benefit': cost_benefit,
             'risks': risks,
-            'overall_score': self._calculate_overall_score(complexity, bottlenecks, risks),
-            'analyzed_at': datetime.now().isoformat()
+            'overall_score': self._calculate_overall_score(complexity, bottlenecks, risks)
         }
     
-    def _analyze_complexity(self, description: str, steps: List[str]) -> Dict[str, Any]:
+    def _scan_keywords(self, description: str) -> Counter:
+        """Occurrences of each scan keyword found in the (lowercased) description"""
+        if self._automaton is not None:
+            return Counter(keyword for _, keyword in self._automaton.iter(description))
+        return Counter({kw: description.count(kw) for kw in self.scan_keywords if kw in description})
+    
+    def _analyze_complexity(self, hits: Counter, step_count: int) -> Dict[str, Any]:
         """Analyze workflow complexity"""
         score = 0
         factors = []
         
         # Step count complexity
-        if len(steps) > 10:
+        if step_count > 10:
             score += 3
             factors.append("High step count (>10 steps)")
-        elif len(steps) > 5:
+        elif step_count > 5:
             score += 2
             factors.append("Medium step count (6-10 steps)")
         else:
@@ -76,7 +141,7 @@ class WorkflowAnalyzer:
         
         # Keyword-based complexity
         for level, keywords in self.complexity_keywords.items():
-            matches = sum(1 for kw in keywords if kw in description)
+            matches = sum(1 for kw in keywords if kw in hits)
             if level == 'high':
                 score += matches * 0.5
                 if matches > 0:
@@ -111,13 +176,13 @@ class WorkflowAnalyzer:
             'description': f"This workflow has {level.lower()} complexity with a score of {complexity_score}/10"
         }
     
-    def _detect_bottlenecks(self, description: str, steps: List[str]) -> Dict[str, Any]:
+    def _detect_bottlenecks(self, hits: Counter) -> Dict[str, Any]:
         """Detect potential bottlenecks"""
         detected = []
         
         # Check for manual interventions
         for indicator in self.bottleneck_indicators:
-            if indicator in description:
+            if indicator in hits:
                 detected.append({
                     'type': 'Manual Intervention',
                     'indicator': indicator,
@@ -127,8 +192,8 @@ class WorkflowAnalyzer:
                 })
         
         # Check for sequential dependencies
-        if 'then' in description or 'after' in description:
-            count = description.count('then') + description.count('after')
+        if 'then' in hits or 'after' in hits:
+            count = hits['then'] + hits['after']
             if count > 3:
                 detected.append({
                     'type': 'Sequential Dependencies',
@@ -144,7 +209,7 @@ class WorkflowAnalyzer:
             'hasBottlenecks': len(detected) > 0
         }
     
-    def _suggest_optimizations(self, description: str, steps: List[str], bottlenecks: Dict) -> List[Dict[str, str]]:
+    def _suggest_optimizations(self, hits: Counter, step_count: int, bottlenecks: Dict) -> List[Dict[str, str]]:
         """Generate optimization suggestions"""
         suggestions = []
         
@@ -159,33 +224,15 @@ class WorkflowAnalyzer:
             })
         
         # Parallelization opportunities
-        if len(steps) > 3:
-            suggestions.append({
-                'title': 'Parallelize Independent Tasks',
-                'description': "Some workflow steps may be able to run in parallel",
-                'impact': 'Medium',
-                'effort': 'Low',
-                'time_savings': "20-30% faster execution"
-            })
+        if step_count > 3:
+            suggestions.append(PARALLELIZE_SUGGESTION)
         
         # Data caching
-        if 'data' in description or 'information' in description:
-            suggestions.append({
-                'title': 'Implement Data Caching',
-                'description': "Cache frequently accessed data to reduce processing time",
-                'impact': 'Medium',
-                'effort': 'Low',
-                'time_savings': "15% reduction in data retrieval time"
-            })
+        if 'data' in hits or 'information' in hits:
+            suggestions.append(DATA_CACHING_SUGGESTION)
         
         # Error handling
-        suggestions.append({
-            'title': 'Add Robust Error Handling',
-            'description': "Implement retry logic and fallback mechanisms",
-            'impact': 'High',
-            'effort': 'Medium',
-            'time_savings': "Prevent workflow failures and reduce manual intervention"
-        })
+        suggestions.append(ERROR_HANDLING_SUGGESTION)
         
         return suggestions
     
@@ -214,14 +261,14 @@ class WorkflowAnalyzer:
             'productivity_boost': "3x faster execution"
         }
     
-    def _analyze_risks(self, description: str, steps: List[str]) -> Dict[str, Any]:
+    def _analyze_risks(self, hits: Counter) -> Dict[str, Any]:
         """Analyze potential risks"""
         risks = []
         risk_score = 0
         
         # Check for risk keywords
         for keyword in self.risk_keywords:
-            if keyword in description:
+            if keyword in hits:
                 risks.append({
                     'type': 'Compliance/Security',
                     'description': f"Workflow involves {keyword} operations",
@@ -231,7 +278,7 @@ class WorkflowAnalyzer:
                 risk_score += 2
         
         # Data handling risks
-        if 'data' in description or 'database' in description:
+        if 'data' in hits or 'database' in hits:
             risks.append({
                 'type': 'Data Integrity',
                 'description': "Workflow processes data",
@@ -241,7 +288,7 @@ class WorkflowAnalyzer:
             risk_score += 1
         
         # Integration risks
-        if 'integrate' in description or 'api' in description:
+        if 'integrate' in hits or 'api' in hits:
             risks.append({
                 'type': 'Integration Failure',
                 'description': "Workflow depends on external systems",
@@ -1,6 +1,11 @@
 from typing import List, Optional, Dict, Any
 from backend.database.supabase_client import get_supabase_client
 from datetime import datetime
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class WorkflowService:
     """Service for managing workflows in Supabase"""
@@ -8,6 +13,11 @@ class WorkflowService:
     def __init__(self):
         self.client = get_supabase_client()
     
+    @staticmethod
+    async def _execute(query):
+        """Run a (blocking) client query in a worker thread so independent calls can overlap"""
+        return await asyncio.to_thread(query.execute)
+    
     async def create_workflow(
         self,
         user_id: str,
@@ -17,45 +27,62 @@ class WorkflowService:
     ) -> Dict[str, Any]:
         """Create a new workflow"""
         try:
-            result = self.client.table("workflows").insert({
+            result = await self._execute(self.client.table("workflows").insert({
                 "user_id": user_id,
                 "name": name,
                 "description": description,
                 "status": status
-            }).execute()
+            }))
             
             return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error creating workflow: {e}")
+        except Exception:
+            logger.exception("Error creating workflow")
             raise
     
     async def get_user_workflows(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all workflows for a user"""
         try:
-            result = self.client.table("workflows")\
-                .select("*, agents(*), workflow_steps(*), metrics(*)")\
-                .eq("user_id", user_id)\
-                .order("created_at", desc=True)\
-                .execute()
+            result = await self._execute(
+                self.client.table("workflows")
+                    .select("*, agents(*), workflow_steps(*), metrics(*)")
+                    .eq("user_id", user_id)
+                    .order("created_at", desc=True)
+            )
             
             return result.data if result.data else []
-        except Exception as e:
-            print(f"Error fetching workflows: {e}")
+        except Exception:
+            logger.exception("Error fetching workflows")
             return []
     
+    async def user_has_workflows(self, user_id: str) -> bool:
+        """Check whether a user owns any workflow (fetches a single id, no nested data)"""
+        try:
+            result = await self._execute(
+                self.client.table("workflows")
+                    .select("id")
+                    .eq("user_id", user_id)
+                    .limit(1)
+            )
+            
+            return bool(result.data)
+        except Exception:
+            logger.exception("Error checking workflows")
+            return False
+    
     async def get_workflow_by_id(self, workflow_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific workflow with all related data"""
         try:
-            result = self.client.table("workflows")\
-                .select("*, agents(*), workflow_steps(*), metrics(*)")\
-                .eq("id", workflow_id)\
-                .eq("user_id", user_id)\
-                .single()\
-                .execute()
+            result = await self._execute(
+                self.client.table("workflows")
+                    .select("*, agents(*), workflow_steps(*), metrics(*)")
+                    .eq("id", workflow_id)
+                    .eq("user_id", user_id)
+                    .single()
+            )
             
             return result.data if result.data else None
-        except Exception as e:
-            print(f"Error fetching workflow: {e}")
+        except Exception:
+            logger.exception("Error fetching workflow")
             return None
     
     async def update_workflow(
@@ -66,29 +93,31 @@ class WorkflowService:
     ) -> Optional[Dict[str, Any]]:
         """Update a workflow"""
         try:
-            result = self.client.table("workflows")\
-                .update(updates)\
-                .eq("id", workflow_id)\
-                .eq("user_id", user_id)\
-                .execute()
+            result = await self._execute(
+                self.client.table("workflows")
+                    .update(updates)
+                    .eq("id", workflow_id)
+                    .eq("user_id", user_id)
+            )
             
             return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error updating workflow: {e}")
+        except Exception:
+            logger.exception("Error updating workflow")
             raise
     
     async def delete_workflow(self, workflow_id: str, user_id: str) -> bool:
         """Delete a workflow"""
         try:
-            self.client.table("workflows")\
-                .delete()\
-                .eq("id", workflow_id)\
-                .eq("user_id", user_id)\
-                .execute()
+            await self._execute(
+                self.client.table("workflows")
+                    .delete()
+                    .eq("id", workflow_id)
+                    .eq("user_id", user_id)
+            )
             
             return True
-        except Exception as e:
-            print(f"Error deleting workflow: {e}")
+        except Exception:
+            logger.exception("Error deleting workflow")
             return False
     
     async def add_agent(
@@ -101,17 +130,17 @@ class WorkflowService:
     ) -> Dict[str, Any]:
         """Add an agent to a workflow"""
         try:
-            result = self.client.table("agents").insert({
+            result = await self._execute(self.client.table("agents").insert({
                 "workflow_id": workflow_id,
                 "role": role,
                 "description": description,
                 "status": status,
                 "confidence_score": confidence_score
-            }).execute()
+            }))
             
             return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error adding agent: {e}")
+        except Exception:
+            logger.exception("Error adding agent")
             raise
     
     async def update_agent_status(
@@ -121,14 +150,15 @@ class WorkflowService:
     ) -> Optional[Dict[str, Any]]:
         """Update agent status"""
         try:
-            result = self.client.table("agents")\
-                .update({"status": status})\
-                .eq("id", agent_id)\
-                .execute()
+            result = await self._execute(
+                self.client.table("agents")
+                    .update({"status": status})
+                    .eq("id", agent_id)
+            )
             
             return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error updating agent status: {e}")
+        except Exception:
+            logger.exception("Error updating agent status")
             raise
     
     async def add_workflow_steps(
@@ -138,23 +168,18 @@ class WorkflowService:
     ) -> List[Dict[str, Any]]:
         """Add multiple steps to a workflow"""
         try:
-            steps_data = [
-                {
-                    "workflow_id": workflow_id,
-                    "step_order": i + 1,
-                    "description": step.get("description", ""),
-                    "actor": step.get("actor")
-                }
-                for i, step in enumerate(steps)
-            ]
-            
-            result = self.client.table("workflow_steps")\
-                .insert(steps_data)\
-                .execute()
+            # insert_workflow_steps (database/add_workflow_steps_rpc.sql) numbers the steps by
+            # array position, so only the step contents are sent
+            result = await self._execute(
+                self.client.rpc("insert_workflow_steps", {
+                    "p_workflow_id": workflow_id,
+                    "p_steps": steps
+                })
+            )
             
             return result.data if result.data else []
-        except Exception as e:
-            print(f"Error adding workflow steps: {e}")
+        except Exception:
+            logger.exception("Error adding workflow steps")
             raise
     
     async def record_metrics(
@@ -165,50 +190,37 @@ class WorkflowService:
     ) -> Dict[str, Any]:
         """Record metrics for a workflow"""
         try:
-            result = self.client.table("metrics").insert({
+            result = await self._execute(self.client.table("metrics").insert({
                 "workflow_id": workflow_id,
                 "automation_rate": automation_rate,
                 "time_saved": time_saved
-            }).execute()
+            }))
             
             return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error recording metrics: {e}")
+        except Exception:
+            logger.exception("Error recording metrics")
             raise
     
     async def get_user_metrics(self, user_id: str) -> Dict[str, Any]:
         """Get aggregated metrics for a user"""
         try:
-            # Get all user workflows
-            workflows = await self.get_user_workflows(user_id)
-            
-            total_workflows = len(workflows)
-            active_agents = 0
-            total_automation = 0
+            # Counted in Postgres (get_user_metrics_agg in database/add_metrics_rpc.sql) -
+            # only three numbers cross the wire instead of every workflow with its agents, steps and metrics
+            result = await self._execute(self.client.rpc("get_user_metrics_agg", {"p_user_id": user_id}))
+            summary = result.data or {}
             
-            for workflow in workflows:
-                if workflow.get("agents"):
-                    active_agents += len([
-                        a for a in workflow["agents"]
-                        if a.get("status") in ["Active", "Deploying"]
-                    ])
-                
-                if workflow.get("metrics") and workflow["metrics"]:
-                    metrics = workflow["metrics"]
-                    if metrics and len(metrics) > 0:
-                        latest_metric = metrics[-1]
-                        if latest_metric.get("automation_rate"):
-                            total_automation += latest_metric["automation_rate"]
+            total_workflows = summary.get("total_workflows", 0)
+            total_automation = summary.get("total_automation", 0)
             
             avg_automation = total_automation // total_workflows if total_workflows > 0 else 0
             
             return {
                 "totalWorkflows": total_workflows,
-                "activeAgents": active_agents,
+                "activeAgents": summary.get("active_agents", 0),
                 "avgAutomation": avg_automation
             }
-        except Exception as e:
-            print(f"Error getting user metrics: {e}")
+        except Exception:
+            logger.exception("Error getting user metrics")
             return {
                 "totalWorkflows": 0,
                 "activeAgents": 0,
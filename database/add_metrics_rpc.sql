@@ -0,0 +1,179 @@
+-- Migration: Aggregate dashboard metrics in the database
+-- Run this in Supabase SQL Editor (after add_execution_logs.sql)
+
+-- Covering index for the per-user time-range scan below: the aggregated columns are stored in the
+-- index leaf pages, so get_user_metrics can answer from an index-only scan without heap lookups
+DROP INDEX IF EXISTS idx_exec_logs_user_executed_at;
+CREATE INDEX IF NOT EXISTS idx_exec_logs_user_executed_at_covering ON execution_logs(user_id, executed_at)
+  INCLUDE (agent_role, latency_ms, success, cost_usd);
+
+-- Hourly per-user, per-role rollup of execution_logs, kept in sync by the triggers below.
+-- Long dashboard ranges read these (at most 24 rows per role per day) instead of every raw log.
+CREATE TABLE IF NOT EXISTS execution_logs_hourly (
+  user_id UUID NOT NULL,
+  hour TIMESTAMP WITH TIME ZONE NOT NULL,
+  agent_role TEXT NOT NULL,
+  executions INTEGER NOT NULL DEFAULT 0,
+  success_count INTEGER NOT NULL DEFAULT 0,
+  sum_latency BIGINT NOT NULL DEFAULT 0,
+  sum_cost DECIMAL(14, 4) NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, hour, agent_role)
+);
+
+ALTER TABLE execution_logs_hourly ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own execution rollups" ON execution_logs_hourly;
+CREATE POLICY "Users can view own execution rollups" ON execution_logs_hourly
+  FOR SELECT USING (auth.uid() = user_id);
+
+-- Statement-level: a multi-row insert/delete is folded into the rollup with one upsert
+CREATE OR REPLACE FUNCTION rollup_execution_logs_hourly()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO execution_logs_hourly AS h (user_id, hour, agent_role, executions, success_count, sum_latency, sum_cost)
+    SELECT user_id, date_trunc('hour', executed_at), COALESCE(agent_role, 'Unknown Agent'),
+           COUNT(*), COUNT(*) FILTER (WHERE success), SUM(latency_ms), COALESCE(SUM(cost_usd), 0)
+    FROM new_logs
+    WHERE user_id IS NOT NULL AND executed_at IS NOT NULL
+    GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, hour, agent_role) DO UPDATE SET
+      executions = h.executions + EXCLUDED.executions,
+      success_count = h.success_count + EXCLUDED.success_count,
+      sum_latency = h.sum_latency + EXCLUDED.sum_latency,
+      sum_cost = h.sum_cost + EXCLUDED.sum_cost;
+  ELSE
+    UPDATE execution_logs_hourly AS h SET
+      executions = h.executions - d.executions,
+      success_count = h.success_count - d.success_count,
+      sum_latency = h.sum_latency - d.sum_latency,
+      sum_cost = h.sum_cost - d.sum_cost
+    FROM (
+      SELECT user_id, date_trunc('hour', executed_at) AS hour, COALESCE(agent_role, 'Unknown Agent') AS agent_role,
+             COUNT(*) AS executions, COUNT(*) FILTER (WHERE success) AS success_count,
+             SUM(latency_ms) AS sum_latency, COALESCE(SUM(cost_usd), 0) AS sum_cost
+      FROM old_logs
+      WHERE user_id IS NOT NULL AND executed_at IS NOT NULL
+      GROUP BY 1, 2, 3
+    ) AS d
+    WHERE h.user_id = d.user_id AND h.hour = d.hour AND h.agent_role = d.agent_role;
+    
+    DELETE FROM execution_logs_hourly
+    WHERE user_id IN (SELECT DISTINCT user_id FROM old_logs) AND executions <= 0;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS execution_logs_hourly_insert ON execution_logs;
+CREATE TRIGGER execution_logs_hourly_insert
+  AFTER INSERT ON execution_logs
+  REFERENCING NEW TABLE AS new_logs
+  FOR EACH STATEMENT EXECUTE FUNCTION rollup_execution_logs_hourly();
+
+DROP TRIGGER IF EXISTS execution_logs_hourly_delete ON execution_logs;
+CREATE TRIGGER execution_logs_hourly_delete
+  AFTER DELETE ON execution_logs
+  REFERENCING OLD TABLE AS old_logs
+  FOR EACH STATEMENT EXECUTE FUNCTION rollup_execution_logs_hourly();
+
+-- Backfill from the logs recorded before the triggers existed
+INSERT INTO execution_logs_hourly (user_id, hour, agent_role, executions, success_count, sum_latency, sum_cost)
+SELECT user_id, date_trunc('hour', executed_at), COALESCE(agent_role, 'Unknown Agent'),
+       COUNT(*), COUNT(*) FILTER (WHERE success), SUM(latency_ms), COALESCE(SUM(cost_usd), 0)
+FROM execution_logs
+WHERE user_id IS NOT NULL AND executed_at IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (user_id, hour, agent_role) DO UPDATE SET
+  executions = EXCLUDED.executions,
+  success_count = EXCLUDED.success_count,
+  sum_latency = EXCLUDED.sum_latency,
+  sum_cost = EXCLUDED.sum_cost;
+
+-- Totals, per-agent stats and a 12-bucket execution histogram for one user in a single round trip.
+-- Bucket 11 is the most recent slice of the range, bucket 0 the oldest. With p_use_rollup the
+-- hourly rollup is read instead of raw logs (each hour is bucketed at its midpoint).
+DROP FUNCTION IF EXISTS get_user_metrics(UUID, TIMESTAMP WITH TIME ZONE, DOUBLE PRECISION);
+CREATE OR REPLACE FUNCTION get_user_metrics(
+  p_user_id UUID,
+  p_cutoff TIMESTAMP WITH TIME ZONE,
+  p_bucket_seconds DOUBLE PRECISION,
+  p_use_rollup BOOLEAN DEFAULT FALSE
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  WITH source AS (
+    SELECT agent_role AS role, executed_at AS at, 1 AS executions, success::INT AS successes,
+           latency_ms AS latency, COALESCE(cost_usd, 0) AS cost
+    FROM execution_logs
+    WHERE NOT p_use_rollup AND user_id = p_user_id AND executed_at >= p_cutoff
+    UNION ALL
+    SELECT agent_role, hour + INTERVAL '30 minutes', executions, success_count, sum_latency, sum_cost
+    FROM execution_logs_hourly
+    WHERE p_use_rollup AND user_id = p_user_id AND hour >= date_trunc('hour', p_cutoff)
+  ),
+  -- Single pass over the source rows: totals, agents and volume all roll up from this (role, bucket) grouping
+  groups AS (
+    SELECT COALESCE(role, 'Unknown Agent') AS role,
+           11 - GREATEST(0, LEAST(11, FLOOR(EXTRACT(EPOCH FROM (NOW() - at)) / p_bucket_seconds)))::INT AS bucket,
+           SUM(executions) AS total,
+           SUM(successes) AS success,
+           SUM(latency) AS latency,
+           SUM(cost) AS cost
+    FROM source
+    GROUP BY 1, 2
+  ),
+  agents AS (
+    SELECT role, SUM(total) AS total, SUM(success) AS success, SUM(latency) AS latency
+    FROM groups
+    GROUP BY role
+  ),
+  buckets AS (
+    SELECT bucket, SUM(total) AS executions
+    FROM groups
+    GROUP BY bucket
+  )
+  SELECT jsonb_build_object(
+    'total', COALESCE(SUM(g.total), 0),
+    'successful', COALESCE(SUM(g.success), 0),
+    'total_latency', COALESCE(SUM(g.latency), 0),
+    'total_cost', COALESCE(SUM(g.cost), 0),
+    'agents', COALESCE((SELECT jsonb_agg(to_jsonb(a) ORDER BY a.role) FROM agents a), '[]'::jsonb),
+    'volume', (SELECT jsonb_agg(COALESCE(b.executions, 0) ORDER BY s.i)
+               FROM generate_series(0, 11) AS s(i)
+               LEFT JOIN buckets b ON b.bucket = s.i)
+  )
+  FROM groups g;
+$$;
+
+-- Workflow dashboard counters for one user: workflow count, agents that are Active/Deploying and the
+-- sum of each workflow's latest automation_rate (the average is taken by the caller)
+CREATE OR REPLACE FUNCTION get_user_metrics_agg(p_user_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'total_workflows', COUNT(*),
+    'active_agents', COALESCE(SUM(a.active), 0),
+    'total_automation', COALESCE(SUM(m.automation_rate), 0)
+  )
+  FROM workflows w
+  CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS active
+    FROM agents
+    WHERE workflow_id = w.id AND status IN ('Active', 'Deploying')
+  ) AS a
+  LEFT JOIN LATERAL (
+    SELECT automation_rate
+    FROM metrics
+    WHERE workflow_id = w.id
+    ORDER BY recorded_at DESC
+    LIMIT 1
+  ) AS m ON TRUE
+  WHERE w.user_id = p_user_id;
+$$;
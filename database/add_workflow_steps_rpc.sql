@@ -0,0 +1,18 @@
+-- Migration: Insert a workflow's steps in one call with server-side ordering
+-- Run this in Supabase SQL Editor (after schema.sql)
+
+-- Bulk-insert steps from a JSON array of {description, actor}. step_order is the 1-based array
+-- position, so clients only send step contents. Returns the inserted rows as a JSON array.
+CREATE OR REPLACE FUNCTION insert_workflow_steps(p_workflow_id UUID, p_steps JSONB)
+RETURNS JSONB
+LANGUAGE sql
+AS $$
+  WITH inserted AS (
+    INSERT INTO workflow_steps (workflow_id, step_order, description, actor)
+    SELECT p_workflow_id, t.ord, COALESCE(t.step->>'description', ''), t.step->>'actor'
+    FROM jsonb_array_elements(p_steps) WITH ORDINALITY AS t(step, ord)
+    RETURNING *
+  )
+  SELECT COALESCE(jsonb_agg(to_jsonb(i) ORDER BY i.step_order), '[]'::jsonb)
+  FROM inserted i;
+$$;
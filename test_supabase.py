@@ -17,11 +17,11 @@ try:
     client = get_supabase_client()
     print("✅ Supabase client created successfully!")
     
-    # Test connection with proper SQL
-    result = client.table('users').select("*").execute()
+    # Test connection with proper SQL (HEAD request - only the row count comes back)
+    result = client.table('users').select("id", count="exact", head=True).execute()
     print(f"✅ Database connection successful!")
     print(f"📊 Users table exists and is accessible")
-    print(f"   Current users: {len(result.data)}")
+    print(f"   Current users: {result.count}")
     
 except Exception as e:
     error_msg = str(e)